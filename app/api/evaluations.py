@@ -56,7 +56,7 @@ async def start_evaluation(
         content = await model_file.read()
         await buffer.write(content)
     
-    if not validate_file_size(temp_model_path, max_size_mb=100):
+    if not validate_file_size(temp_model_path, max_size_mb=100).ok:
         os.remove(temp_model_path)
         raise HTTPException(status_code=413, detail="File too large")
     
@@ -257,7 +257,7 @@ async def get_job_status(job_id: int, db: AsyncSession = Depends(get_async_db)):
     if not job: 
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     
-    return {"job_id": job.id, "status": str(job.status.value)}
+    return {"job_id": job.id, "status": job.status}
 
 @router.get("/{job_id}/results")
 async def get_job_results(job_id: int, db: AsyncSession = Depends(get_async_db)):
@@ -1,6 +1,7 @@
 # app/api/models.py
 
 from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi.responses import ORJSONResponse
 import os
 import logging
 from typing import Optional, List
@@ -85,14 +86,16 @@ async def get_all_models(
         has_next = len(models_from_db) == limit and len(models_from_db) > 0
         next_cursor = models_from_db[-1].upload_time.isoformat() if has_next else None
         
-        return ModelPaginatedResponse(
-            items=items_as_pydantic,
-            total=total,
-            page=1,  # Cursor pagination doesn't use page numbers
-            pages=(total + limit - 1) // limit if total > 0 else 1,
-            has_next=has_next,
-            next_cursor=next_cursor
-        )
+        # Items are already validated above; return them directly instead of letting
+        # response_model re-validate every row (it still documents the schema)
+        return ORJSONResponse(content={
+            "items": items_as_pydantic,
+            "total": total,
+            "page": 1,  # Cursor pagination doesn't use page numbers
+            "pages": (total + limit - 1) // limit if total > 0 else 1,
+            "has_next": has_next,
+            "next_cursor": next_cursor
+        })
     
     except Exception as e:
         logger.error(f"Error fetching models: {e}", exc_info=True)
@@ -137,7 +137,7 @@ async def cleanup_model_files_endpoint(model_id: int):
         Cleanup results for the specified model
     """
     try:
-        result = cleanup_model_files(model_id)
+        result = await asyncio.to_thread(cleanup_model_files, model_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clean up model files: {str(e)}")
@@ -154,7 +154,7 @@ async def cleanup_failed_evaluations_endpoint():
         Cleanup results for failed evaluations
     """
     try:
-        result = cleanup_failed_evaluations()
+        result = await cleanup_failed_evaluations()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clean up failed evaluations: {str(e)}")
@@ -199,8 +199,10 @@ async def validate_file_endpoint(
         if allowed_extensions:
             extensions_list = [ext.strip().lower() for ext in allowed_extensions.split(',')]
         
-        # Validate file size
-        size_valid = validate_file_size(file_path, max_size_mb)
+        # Validate file size; the result carries the stat so we don't hit the disk again
+        size_check = validate_file_size(file_path, max_size_mb)
+        size_valid = size_check.ok
+        file_exists = size_check.stat is not None
         
         # Validate file type if extensions provided
         type_valid = True
@@ -212,12 +214,12 @@ async def validate_file_endpoint(
             "size_validation": {
                 "valid": size_valid,
                 "max_size_mb": max_size_mb,
-                "actual_size_mb": os.path.getsize(file_path) / (1024 * 1024) if os.path.exists(file_path) else 0
+                "actual_size_mb": size_check.size_bytes / (1024 * 1024)
             },
             "type_validation": {
                 "valid": type_valid,
                 "allowed_extensions": extensions_list,
-                "actual_extension": os.path.splitext(file_path)[1].lower() if os.path.exists(file_path) else ""
+                "actual_extension": os.path.splitext(file_path)[1].lower() if file_exists else ""
             },
             "overall_valid": size_valid and type_valid,
             "timestamp": asyncio.get_event_loop().time()
@@ -68,7 +68,7 @@ async def run_evaluation_task(
                 print(f"Job {job_id} not found in DB. Exiting evaluation task.")
                 return
 
-            job.status = JobStatus.PROCESSING
+            job.status = JobStatus.PROCESSING.value
             await db_session.commit()
 
             os.makedirs(job_dir, exist_ok=True) # Ensure permanent job artifact directory exists
@@ -232,7 +232,7 @@ async def run_evaluation_task(
 
             final_metrics = {k: round(v, 4) for k, v in metrics.items() if v is not None}
             
-            job.status = JobStatus.COMPLETED
+            job.status = JobStatus.COMPLETED.value
             job.results = final_metrics
             job.results['insights'] = insights_from_preprocessing + generate_insights(final_metrics)
             job.artifacts = artifacts
@@ -253,7 +253,7 @@ async def run_evaluation_task(
         import traceback
         print(traceback.format_exc())
         if job:
-            job.status = JobStatus.FAILED
+            job.status = JobStatus.FAILED.value
             job.error_message = str(e)
             try:
                 await db_session.commit()
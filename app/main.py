@@ -1,11 +1,11 @@
 # app/main.py
 
 import asyncio
-from datetime import datetime
 import os
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.concurrency import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
@@ -26,7 +26,10 @@ from .api import auth, models, evaluations, storage
 from .middleware.cache_middleware import CacheMiddleware
 from .middleware.compression import CompressionMiddleware
 from .tasks.cleanup_scheduler import startup_storage_management, shutdown_storage_management
-from .middleware.error_handler import register_error_handlers, request_id_middleware, request_logging_middleware
+from .middleware.error_handler import register_error_handlers, ExceptionDispatchMiddleware, RequestIDMiddleware, RequestLoggingMiddleware
+from .utils.error_bus import start_error_bus, stop_error_bus
+from .utils.error_monitor import close_error_monitor
+from .utils.time_utils import utcnow_iso_z
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +87,9 @@ async def lifespan(app: FastAPI):
                     logger.warning("⚠️ Starting app without database - some features may not work")
                     # Don't raise the error, just log it and continue
         
+        # Start background error logging/monitoring consumer
+        start_error_bus()
+        
         # Initialize storage management
         try:
             await startup_storage_management()
@@ -106,6 +112,14 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️ Error during storage shutdown: {e}")
     
     logger.info("🛑 Shutting down ModelWhiz API...")
+    try:
+        await stop_error_bus()
+    except Exception as e:
+        logger.warning(f"⚠️ Error flushing error bus: {e}")
+    try:
+        await close_error_monitor()
+    except Exception as e:
+        logger.warning(f"⚠️ Error flushing error monitor: {e}")
     try:
         await close_cache()
         logger.info("✅ Cache connections closed.")
@@ -115,7 +129,11 @@ async def lifespan(app: FastAPI):
         logger.error(f"⚠️ Error during shutdown: {e}")
     logger.info("👋 ModelWhiz API shutdown complete.")
 
-app = FastAPI(title="ModelWhiz API", lifespan=lifespan)
+app = FastAPI(title="ModelWhiz API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# --- Exception Dispatch Middleware ---
+# Added first so it sits innermost and its error responses still pass through CORS and friends
+app.add_middleware(ExceptionDispatchMiddleware)
 
 # --- CORS Middleware ---
 # Get CORS origins from environment or use defaults
@@ -128,19 +146,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Request ID Middleware ---
-app.middleware("http")(request_id_middleware)
-
 # --- Request Logging Middleware ---
-app.middleware("http")(request_logging_middleware)
+app.add_middleware(RequestLoggingMiddleware)
+
+# --- Request ID Middleware ---
+# Added after logging so it wraps it and the request ID is already set when logging runs
+app.add_middleware(RequestIDMiddleware)
 
 # --- Cache Middleware ---
 app.add_middleware(CacheMiddleware)
 
 # --- Compression Middleware ---
-compression_level = int(os.getenv("COMPRESSION_LEVEL", "6"))
+compression_level = int(os.getenv("COMPRESSION_LEVEL", "1"))
 min_size = int(os.getenv("MINIMUM_COMPRESSION_SIZE", "100"))
-app.add_middleware(CompressionMiddleware, minimum_size=min_size, compression_level=compression_level)
+zstd_level = int(os.getenv("ZSTD_COMPRESSION_LEVEL", "3"))
+app.add_middleware(CompressionMiddleware, minimum_size=min_size, compression_level=compression_level, zstd_level=zstd_level)
 
 # --- Routers ---
 app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
@@ -180,10 +200,53 @@ async def health_check():
         "status": "healthy" if (db_healthy and cache_healthy) else "unhealthy",
         "database": "healthy" if db_healthy else "unhealthy", 
         "cache": "healthy" if cache_healthy else "unhealthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": utcnow_iso_z(),
         "version": "1.0.0"
     }
 
+# Seconds to wait for Celery workers to answer the /health/full ping
+WORKER_PING_TIMEOUT = 1.0
+
+async def _check_workers_health() -> bool:
+    """Ping the Celery workers without blocking the event loop"""
+    from .workers.celery_app import celery_app
+    replies = await asyncio.to_thread(celery_app.control.ping, timeout=WORKER_PING_TIMEOUT)
+    return bool(replies)
+
+@app.get("/health/full")
+async def full_health_check():
+    """
+    Report every subsystem in one response; the database, cache and worker
+    probes run concurrently.
+    """
+    db_healthy, cache_healthy, workers_healthy = await asyncio.gather(
+        check_database_health(retries=1),
+        check_redis_health(),
+        _check_workers_health(),
+        return_exceptions=True,
+    )
+    for name, outcome in (("Database", db_healthy), ("Cache", cache_healthy), ("Worker", workers_healthy)):
+        if isinstance(outcome, BaseException):
+            logger.error(f"{name} health check failed: {outcome}")
+    db_healthy = db_healthy is True
+    cache_healthy = cache_healthy is True
+    workers_healthy = workers_healthy is True
+
+    healthy = db_healthy and cache_healthy
+    return ORJSONResponse(
+        status_code=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "healthy" if healthy else "unhealthy",
+            "backend": "healthy",
+            "api": "healthy",
+            "db": "healthy" if db_healthy else "unhealthy",
+            "redis": "healthy" if cache_healthy else "unhealthy",
+            "workers": "healthy" if workers_healthy else "unhealthy",
+            "timestamp": utcnow_iso_z(),
+            "version": "1.0.0"
+        },
+    )
+
 # --- Performance Monitoring Endpoints ---
 @app.get("/monitoring/errors")
 async def get_error_monitoring_stats(
@@ -228,7 +291,7 @@ async def get_performance_metrics():
         logger.error(f"Error getting performance metrics: {e}")
         return {
             "error": "Performance monitoring not available",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": utcnow_iso_z()
         }
 
 @app.get("/monitoring/cache")
@@ -271,5 +334,5 @@ async def read_root():
         "message": "ModelWhiz backend is running", 
         "version": "1.0.0",
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": utcnow_iso_z()
     }
@@ -1,11 +1,13 @@
 # app/middleware/cache_middleware.py
 
 import hashlib
-import json
+import orjson
 import logging
 import os
+import time
 from typing import Dict, Optional, Set
 from datetime import datetime, timezone
+from cachetools import TTLCache
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response, JSONResponse, StreamingResponse
@@ -14,12 +16,21 @@ from ..cache import cache_client
 logger = logging.getLogger(__name__)
 
 class CacheMiddleware(BaseHTTPMiddleware):
+    _CACHEABLE_STATUS_CODES = frozenset((200, 203, 300, 301, 302, 404, 410))
+    # Starlette keeps raw header names lowercased, so these match without .lower()
+    _CACHE_STRIP = frozenset((b"content-length", b"transfer-encoding", b"x-cache"))
+
     def __init__(self, app, cache_enabled: Optional[bool] = None):
         super().__init__(app)
         self.cache_enabled = cache_enabled if cache_enabled is not None else (
             os.getenv("ENVIRONMENT", "development").lower() in ("production", "staging")
         )
         self.max_cache_size = int(os.getenv("MAX_CACHE_SIZE", 1024 * 1024))
+        # Process-local L1 tier in front of Redis so hot keys skip the network round-trip
+        self._l1 = TTLCache(
+            maxsize=int(os.getenv("HTTP_L1_CACHE_SIZE", "2048")),
+            ttl=int(os.getenv("HTTP_L1_CACHE_TTL", "60")),
+        )
         self.cache_config = {
             "/": {"ttl": 3600, "public": True, "vary": []},
             "/docs": {"ttl": 3600, "public": True, "vary": []},
@@ -33,14 +44,14 @@ class CacheMiddleware(BaseHTTPMiddleware):
         }
         self.no_cache_routes: Set[str] = {
             "/api/auth/login", "/api/auth/logout", "/api/auth/refresh",
-            "/api/auth/register", "/api/evaluations",
+            "/api/auth/register", "/api/evaluations", "/health/full",
         }
         self.no_cache_methods: Set[str] = {"POST", "PUT", "DELETE", "PATCH"}
-        self.cacheable_content_types: Set[str] = {
+        self.cacheable_content_types: frozenset = frozenset((
             "application/json", "text/html", "text/plain", "text/css",
             "text/javascript", "application/javascript", "image/png",
             "image/jpeg", "image/svg+xml"
-        }
+        ))
 
     # ... (keep all helper methods: _should_cache_request, _should_cache_response, etc. as they are) ...
     def _should_cache_request(self, request: Request) -> bool:
@@ -52,28 +63,38 @@ class CacheMiddleware(BaseHTTPMiddleware):
         return True
 
     def _should_cache_response(self, response: Response) -> bool:
-        if response.status_code not in {200, 203, 300, 301, 302, 404, 410}: return False
-        content_type = response.headers.get("content-type", "").split(";")[0]
-        if content_type not in self.cacheable_content_types: return False
+        if response.status_code not in self._CACHEABLE_STATUS_CODES: return False
+        content_type = response.headers.get("content-type", "")
+        semi = content_type.find(";")
+        if semi >= 0: content_type = content_type[:semi]
+        if content_type.strip() not in self.cacheable_content_types: return False
         content_length = response.headers.get("content-length")
         if content_length and int(content_length) > self.max_cache_size: return False
         if "no-store" in response.headers.get("cache-control", "").lower(): return False
         return True
 
     def _generate_cache_key(self, request: Request, config: Dict) -> str:
-        key_components = [
-            request.method, request.url.path, str(sorted(request.query_params.items())),
-        ]
-        vary_headers = config.get("vary", [])
-        for header in vary_headers:
+        # Feed components straight into the hash; the digest already hides raw header values.
+        # Every component is length-prefixed, so decoded values containing separators
+        # (?a=b%26c%3Dd vs ?a=b&c=d) can't collide
+        h = hashlib.blake2b(digest_size=16)
+        update = h.update
+
+        def feed(value: str):
+            data = value.encode()
+            update(len(data).to_bytes(4, "big")); update(data)
+
+        feed(request.method)
+        feed(request.url.path)
+        params = sorted(request.query_params.multi_items())
+        update(len(params).to_bytes(4, "big"))
+        for k, v in params:
+            feed(k); feed(v)
+        for header in config.get("vary", []):
             header_value = request.headers.get(header.lower(), "")
             if header_value:
-                if header.lower() == "authorization":
-                    header_value = hashlib.md5(header_value.encode()).hexdigest()[:16]
-                key_components.append(f"{header}:{header_value}")
-        key_string = "|".join(key_components)
-        key_hash = hashlib.sha256(key_string.encode()).hexdigest()
-        return f"http_cache:{request.method}:{key_hash}"
+                feed(header); feed(header_value)
+        return f"http_cache:{request.method}:{h.hexdigest()}"
 
     def _get_cache_config(self, path: str) -> Dict[str, any]:
         if path in self.cache_config: return self.cache_config[path]
@@ -83,13 +104,13 @@ class CacheMiddleware(BaseHTTPMiddleware):
                 best_match, best_config = route_pattern, config
         return best_config
 
-    def _add_cache_headers(self, response: Response, config: Dict, cache_key: str, is_cached: bool = False):
+    def _add_cache_headers(self, response: Response, config: Dict, cache_key: str, is_cached: bool = False,
+                           body: Optional[bytes] = None):
         ttl = config.get("ttl", 300)
         is_public = config.get("public", False)
         vary_headers = config.get("vary", [])
-        if hasattr(response, 'body') and response.body:
-            etag_content = response.body if isinstance(response.body, bytes) else str(response.body).encode()
-            etag = hashlib.md5(etag_content).hexdigest()[:16]
+        if body:
+            etag = hashlib.md5(body).hexdigest()[:16]
             response.headers["ETag"] = f'"{etag}"'
         response.headers["Last-Modified"] = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
         cache_directives = ["public" if is_public else "private", f"max-age={ttl}"]
@@ -118,13 +139,11 @@ class CacheMiddleware(BaseHTTPMiddleware):
                 logger.debug("Date parsing error for If-Modified-Since")
         return None
 
-    async def _extract_response_body(self, response: Response) -> Optional[bytes]:
+    def _extract_response_body(self, body) -> Optional[bytes]:
         try:
-            if isinstance(response, StreamingResponse):
-                logger.debug("Skipping caching for StreamingResponse"); return None
-            if hasattr(response, 'body'):
-                return response.body if isinstance(response.body, bytes) else response.body.encode()
-            return None
+            if body is None:
+                return None
+            return body if isinstance(body, bytes) else str(body).encode()
         except Exception as e:
             logger.error(f"Error extracting response body: {e}"); return None
 
@@ -140,8 +159,23 @@ class CacheMiddleware(BaseHTTPMiddleware):
         config = self._get_cache_config(request.url.path)
         cache_key = self._generate_cache_key(request, config)
 
+        # Routes with a shorter TTL than the L1 tier would serve stale entries from it
+        use_l1 = config["ttl"] >= self._l1.ttl
+
         try:
-            cached_data = await cache_client.get(cache_key)
+            cached_data = self._l1.get(cache_key) if use_l1 else None
+            # An L1 copy of a Redis entry must not outlive the route's TTL from when it was stored
+            # (entries from before cached_at became an epoch int carry an ISO string; treat as expired)
+            if cached_data is not None and not (
+                isinstance(cached_data.get("cached_at"), int)
+                and cached_data["cached_at"] + config["ttl"] > time.time()
+            ):
+                self._l1.pop(cache_key, None)
+                cached_data = None
+            if cached_data is None:
+                cached_data = await cache_client.get(cache_key)
+                if cached_data and use_l1 and isinstance(cached_data.get("cached_at"), int):
+                    self._l1[cache_key] = cached_data
             if cached_data:
                 conditional_response = self._check_conditional_request(request, cached_data)
                 if conditional_response:
@@ -149,7 +183,7 @@ class CacheMiddleware(BaseHTTPMiddleware):
                 logger.info(f"Cache HIT for {request.url.path}")
                 
                 # Return a JSONResponse to maintain FastAPI response validation compatibility
-                headers = cached_data.get("headers", {})
+                headers = dict(cached_data.get("headers", {}))
                 headers["X-Cache"] = "HIT"
                 return JSONResponse(
                     content=cached_data["content"],
@@ -163,32 +197,35 @@ class CacheMiddleware(BaseHTTPMiddleware):
         logger.info(f"Cache MISS for {request.url.path}")
         response = await call_next(request)
 
+        # Streaming bodies can't be replayed once drained - never touch them
+        if isinstance(response, StreamingResponse):
+            self._add_cache_headers(response, config, cache_key, is_cached=False)
+            return response
+
+        # Read the body once; both the cache store and the ETag work from this reference
+        response_body = self._extract_response_body(getattr(response, "body", None))
+
         if self._should_cache_response(response):
             try:
-                response_body = await self._extract_response_body(response)
                 if response_body and len(response_body) <= self.max_cache_size:
                     try:
-                        content = json.loads(response_body.decode()) if response_body else None
-                    except (json.JSONDecodeError, UnicodeDecodeError):
-                        content = response_body.decode() if response_body else None
-                    
-                    # Ensure we're storing dictionaries, not Pydantic model instances
-                    if hasattr(content, 'model_dump'):
-                        content = content.model_dump()
-                    elif isinstance(content, list) and content and hasattr(content[0], 'model_dump'):
-                        content = [item.model_dump() if hasattr(item, 'model_dump') else item for item in content]
+                        content = orjson.loads(response_body)
+                    except orjson.JSONDecodeError:
+                        content = response_body.decode(errors="replace")
                     if content is not None:
                         cache_data = {
                             "content": content,
                             "status_code": response.status_code,
-                            "headers": {k: v for k, v in response.headers.items() if k.lower() not in {"content-length", "transfer-encoding", "x-cache"}},
-                            "cached_at": datetime.now(timezone.utc).isoformat()
+                            "headers": {k.decode("latin-1"): v.decode("latin-1") for k, v in response.headers.raw if k not in self._CACHE_STRIP},
+                            "cached_at": int(time.time())
                         }
                         await cache_client.set(cache_key, cache_data, config["ttl"])
+                        if use_l1:
+                            self._l1[cache_key] = cache_data
             except Exception as e:
                 logger.error(f"Cache storage error: {e}")
 
-        self._add_cache_headers(response, config, cache_key, is_cached=False)
+        self._add_cache_headers(response, config, cache_key, is_cached=False, body=response_body)
         return response
 
 
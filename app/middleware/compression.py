@@ -1,14 +1,32 @@
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-import gzip
 import json
+import os
+import zlib
 from typing import Callable
 
+# zstandard is optional - fall back to gzip-only when it is not installed
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstd = None
+    ZSTD_AVAILABLE = False
+
 class CompressionMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, minimum_size: int = 1024, compression_level: int = 6):
+    def __init__(self, app, minimum_size: int = 1024, compression_level: int = 1, zstd_level: int = 3):
         super().__init__(app)
         self.minimum_size = minimum_size
         self.compression_level = compression_level
+        self._zctx = None
+        if ZSTD_AVAILABLE:
+            # Optional pre-trained dictionary over typical JSON response shapes
+            dict_data = None
+            dict_path = os.getenv("ZSTD_DICT_PATH")
+            if dict_path and os.path.exists(dict_path):
+                with open(dict_path, "rb") as f:
+                    dict_data = zstd.ZstdCompressionDict(f.read())
+            self._zctx = zstd.ZstdCompressor(level=zstd_level, threads=-1, dict_data=dict_data)
         
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         response = await call_next(request)
@@ -17,11 +35,21 @@ class CompressionMiddleware(BaseHTTPMiddleware):
         content_type = response.headers.get("content-type", "")
         if not self._should_compress(content_type):
             return response
-            
+
+        # Upstream already encoded the body - pass it through untouched
+        if response.headers.get("content-encoding"):
+            return response
+
+        # Known-small bodies never reach the threshold, so don't buffer them
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) < self.minimum_size:
+            return response
+
         # Get response body
-        response_body = b""
+        chunks = []
         async for chunk in response.body_iterator:
-            response_body += chunk
+            chunks.append(chunk)
+        response_body = b"".join(chunks)
             
         # Only compress if body is large enough
         if len(response_body) < self.minimum_size:
@@ -32,30 +60,33 @@ class CompressionMiddleware(BaseHTTPMiddleware):
                 media_type=response.media_type
             )
             
-        # Check if client accepts gzip
-        accept_encoding = request.headers.get("accept-encoding", "")
-        if "gzip" not in accept_encoding.lower():
+        # Pick the best encoding the client accepts: zstd, then deflate, then gzip
+        accept_encoding = request.headers.get("accept-encoding", "").lower()
+        if self._zctx is not None and "zstd" in accept_encoding:
+            encoding = "zstd"
+            compressed_body = self._zctx.compress(response_body)
+        elif "deflate" in accept_encoding:
+            encoding = "deflate"
+            compressed_body = zlib.compress(response_body, self.compression_level)
+        elif "gzip" in accept_encoding:
+            # wbits=31 emits gzip framing straight from zlib, skipping GzipFile/BytesIO
+            encoding = "gzip"
+            compressed_body = zlib.compress(response_body, self.compression_level, wbits=31)
+        else:
             return Response(
                 content=response_body,
                 status_code=response.status_code,
                 headers=response.headers,
                 media_type=response.media_type
             )
-            
-        # Compress the response
-        compressed_body = gzip.compress(response_body, compresslevel=self.compression_level)
         
-        # Update headers
-        new_headers = dict(response.headers)
-        new_headers["content-encoding"] = "gzip"
-        new_headers["content-length"] = str(len(compressed_body))
+        # Update headers in place and hand the raw header list over directly
+        response.headers["content-encoding"] = encoding
+        response.headers["content-length"] = str(len(compressed_body))
         
-        return Response(
-            content=compressed_body,
-            status_code=response.status_code,
-            headers=new_headers,
-            media_type=response.media_type
-        )
+        compressed_response = Response(content=compressed_body, status_code=response.status_code)
+        compressed_response.raw_headers = response.raw_headers
+        return compressed_response
         
     def _should_compress(self, content_type: str) -> bool:
         """Determine if content should be compressed based on content type"""
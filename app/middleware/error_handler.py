@@ -4,23 +4,32 @@ Provides consistent error handling and structured error responses
 """
 
 import logging
+import time
 import traceback
+from collections import deque
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.datastructures import URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
 import uuid
 import os
+import orjson
 
-from app.utils.logger import log_error
-from app.utils.error_monitor import track_error, ErrorTypes
+from app.utils.logger import log_request
+from app.utils.error_monitor import ErrorTypes
+from app.utils.error_bus import enqueue_error, enqueue_response
+from app.utils.time_utils import utcnow_iso_z
 
 class ModelWhizError(Exception):
     """Base exception class for ModelWhiz application errors"""
     
+    __slots__ = ("code", "message", "status_code", "details")
+    
     def __init__(self, 
                  code: str, 
                  message: str, 
@@ -35,39 +44,85 @@ class ModelWhizError(Exception):
 # Specific error classes
 class DatabaseError(ModelWhizError):
     """Database operation errors"""
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__("DATABASE_ERROR", message, 500, details)
 
 class FileOperationError(ModelWhizError):
     """File operation errors"""
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__("FILE_OPERATION_ERROR", message, 500, details)
 
 class MLProcessingError(ModelWhizError):
     """ML processing errors"""
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__("ML_PROCESSING_ERROR", message, 500, details)
 
 class AuthenticationError(ModelWhizError):
     """Authentication errors"""
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__("AUTHENTICATION_ERROR", message, 401, details)
 
 class AuthorizationError(ModelWhizError):
     """Authorization errors"""
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__("AUTHORIZATION_ERROR", message, 403, details)
 
 class ValidationError(ModelWhizError):
     """Validation errors"""
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__("VALIDATION_ERROR", message, 400, details)
 
 class ResourceNotFoundError(ModelWhizError):
     """Resource not found errors"""
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__("RESOURCE_NOT_FOUND", message, 404, details)
 
+class ErrorJSONResponse(ORJSONResponse):
+    """orjson-backed response that renders UTC datetimes with a trailing Z"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+        )
+
+# Pre-generated request IDs for the rare case a handler runs before RequestIDMiddleware
+_RID_POOL_SIZE = 1024
+_rid_pool: deque = deque()
+
+def _rid_pool_pop() -> str:
+    """Pop a request ID from the pool, refilling it from a single os.urandom call"""
+    if not _rid_pool:
+        raw = os.urandom(16 * _RID_POOL_SIZE)
+        _rid_pool.extend(
+            uuid.UUID(bytes=raw[i:i + 16], version=4).hex
+            for i in range(0, len(raw), 16)
+        )
+    return _rid_pool.popleft()
+
+def _get_rid(request: Request) -> str:
+    """Get the request ID set by RequestIDMiddleware, falling back to the pool"""
+    return getattr(request.state, "request_id", None) or _rid_pool_pop()
+
+@lru_cache(maxsize=256)
+def _error_skeleton(code: str, message: str) -> Dict[str, Any]:
+    """Static part of an error body; callers copy it and fill in the per-request fields"""
+    return {"code": code, "message": message, "timestamp": None, "request_id": None, "details": None}
+
 def create_error_response(
     code: str, 
     message: str, 
@@ -76,30 +131,59 @@ def create_error_response(
     details: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """Create standardized error response"""
-    return {
+    try:
+        error = _error_skeleton(code, message).copy()
+    except TypeError:
+        # Unhashable message (e.g. a dict HTTPException detail) can't be cached
+        error = {"code": code, "message": message}
+    error["timestamp"] = utcnow_iso_z()
+    error["request_id"] = request_id
+    error["details"] = details or {}
+    return {"error": error}
+
+def _compile_error_template(code: str, message: str, details: Dict[str, Any]) -> bytes:
+    """Pre-serialize an error body with quoted "__NAME__" sentinels for the per-request fields"""
+    return orjson.dumps({
         "error": {
             "code": code,
             "message": message,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "request_id": request_id,
-            "details": details or {}
+            "timestamp": "__TS__",
+            "request_id": "__RID__",
+            "details": details
         }
-    }
+    })
+
+def _render_error_template(template: bytes, request_id: str, **fields: Any) -> bytes:
+    """Fill a compiled template; each sentinel is replaced by the JSON encoding of its value"""
+    body = template.replace(b'"__RID__"', orjson.dumps(request_id), 1)
+    body = body.replace(b'"__TS__"', orjson.dumps(utcnow_iso_z()), 1)
+    for name, value in fields.items():
+        body = body.replace(f'"__{name.upper()}__"'.encode(), orjson.dumps(value), 1)
+    return body
+
+# Bodies for high-volume burst responses (rate limiting, empty validation errors)
+_RATE_LIMIT_TEMPLATE = _compile_error_template(
+    "RATE_LIMIT_EXCEEDED",
+    "Too many requests, please try again later",
+    {"retry_after": "__RETRY_AFTER__", "limit": "__LIMIT__"}
+)
+_EMPTY_VALIDATION_TEMPLATE = _compile_error_template(
+    "VALIDATION_ERROR",
+    "Request validation failed",
+    {"validation_errors": []}
+)
 
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for all uncaught exceptions"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
-    # Log the error with full stack trace
+    # Log (with full stack trace) and track the error off the response path
     error_type = exc.__class__.__name__
     error_message = str(exc)
-    log_error(request_id, error_type, error_message, exc_info=True)
-    
-    # Track error for monitoring and alerting
-    await track_error(error_type, error_message, request_id)
+    enqueue_error(request_id, error_type, error_message, exc_info=True, track_type=error_type)
     
     # Return generic server error response
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=500,
         content=create_error_response(
             code="INTERNAL_SERVER_ERROR",
@@ -111,11 +195,11 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handler for HTTP exceptions"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
-    log_error(request_id, "HTTPException", f"{exc.status_code}: {exc.detail}")
+    enqueue_error(request_id, "HTTPException", f"{exc.status_code}: {exc.detail}", exc_info=False)
     
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=exc.status_code,
         content=create_error_response(
             code=f"HTTP_{exc.status_code}",
@@ -127,7 +211,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handler for request validation errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     # Extract validation errors
     validation_errors = []
@@ -138,9 +222,16 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "type": error["type"]
         })
     
-    log_error(request_id, "ValidationError", f"Request validation failed: {validation_errors}")
+    enqueue_error(request_id, "ValidationError", f"Request validation failed: {validation_errors}", exc_info=False)
     
-    return JSONResponse(
+    if not validation_errors:
+        return Response(
+            content=_render_error_template(_EMPTY_VALIDATION_TEMPLATE, request_id),
+            status_code=422,
+            media_type="application/json"
+        )
+    
+    return ErrorJSONResponse(
         status_code=422,
         content=create_error_response(
             code="VALIDATION_ERROR",
@@ -153,15 +244,12 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 async def sqlalchemy_error_handler(request: Request, exc: SQLAlchemyError):
     """Handler for SQLAlchemy database errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = str(exc)
-    log_error(request_id, "DatabaseError", error_message, exc_info=True)
-    
-    # Track database error for monitoring
-    await track_error(ErrorTypes.DATABASE, error_message, request_id)
+    enqueue_error(request_id, "DatabaseError", error_message, exc_info=True, track_type=ErrorTypes.DATABASE)
     
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=500,
         content=create_error_response(
             code="DATABASE_ERROR",
@@ -174,15 +262,12 @@ async def sqlalchemy_error_handler(request: Request, exc: SQLAlchemyError):
 
 async def modelwhiz_error_handler(request: Request, exc: ModelWhizError):
     """Handler for ModelWhiz custom errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
-    log_error(request_id, exc.code, exc.message, exc_info=False)
+    # Log and track custom errors for monitoring
+    enqueue_error(request_id, exc.code, exc.message, exc_info=False, track_type=exc.code.lower())
     
-    # Track custom errors for monitoring
-    error_type = exc.code.lower()
-    await track_error(error_type, exc.message, request_id)
-    
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=exc.status_code,
         content=create_error_response(
             code=exc.code,
@@ -195,15 +280,12 @@ async def modelwhiz_error_handler(request: Request, exc: ModelWhizError):
 
 async def file_not_found_error_handler(request: Request, exc: FileNotFoundError):
     """Handler for file not found errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = f"File not found: {str(exc)}"
-    log_error(request_id, "FileNotFoundError", error_message, exc_info=True)
-    
-    # Track file operation error for monitoring
-    await track_error(ErrorTypes.FILE, error_message, request_id)
+    enqueue_error(request_id, "FileNotFoundError", error_message, exc_info=False, track_type=ErrorTypes.FILE)
     
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=404,
         content=create_error_response(
             code="FILE_NOT_FOUND",
@@ -216,15 +298,12 @@ async def file_not_found_error_handler(request: Request, exc: FileNotFoundError)
 
 async def permission_error_handler(request: Request, exc: PermissionError):
     """Handler for permission errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = f"Permission denied: {str(exc)}"
-    log_error(request_id, "PermissionError", error_message, exc_info=True)
-    
-    # Track permission error for monitoring
-    await track_error(ErrorTypes.PERMISSION, error_message, request_id)
+    enqueue_error(request_id, "PermissionError", error_message, exc_info=False, track_type=ErrorTypes.PERMISSION)
     
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=403,
         content=create_error_response(
             code="PERMISSION_DENIED",
@@ -237,15 +316,12 @@ async def permission_error_handler(request: Request, exc: PermissionError):
 
 async def timeout_error_handler(request: Request, exc: TimeoutError):
     """Handler for timeout errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = f"Operation timed out: {str(exc)}"
-    log_error(request_id, "TimeoutError", error_message, exc_info=True)
+    enqueue_error(request_id, "TimeoutError", error_message, exc_info=False, track_type=ErrorTypes.TIMEOUT)
     
-    # Track timeout error for monitoring
-    await track_error(ErrorTypes.TIMEOUT, error_message, request_id)
-    
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=408,
         content=create_error_response(
             code="REQUEST_TIMEOUT",
@@ -258,15 +334,12 @@ async def timeout_error_handler(request: Request, exc: TimeoutError):
 
 async def connection_error_handler(request: Request, exc: ConnectionError):
     """Handler for connection errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = f"Connection error: {str(exc)}"
-    log_error(request_id, "ConnectionError", error_message, exc_info=True)
-    
-    # Track network error for monitoring
-    await track_error(ErrorTypes.NETWORK, error_message, request_id)
+    enqueue_error(request_id, "ConnectionError", error_message, exc_info=True, track_type=ErrorTypes.NETWORK)
     
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=503,
         content=create_error_response(
             code="SERVICE_UNAVAILABLE",
@@ -279,15 +352,12 @@ async def connection_error_handler(request: Request, exc: ConnectionError):
 
 async def memory_error_handler(request: Request, exc: MemoryError):
     """Handler for memory errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = f"Memory error: {str(exc)}"
-    log_error(request_id, "MemoryError", error_message, exc_info=True)
+    enqueue_error(request_id, "MemoryError", error_message, exc_info=True, track_type=ErrorTypes.MEMORY)
     
-    # Track memory error for monitoring
-    await track_error(ErrorTypes.MEMORY, error_message, request_id)
-    
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=500,
         content=create_error_response(
             code="MEMORY_ERROR",
@@ -300,15 +370,12 @@ async def memory_error_handler(request: Request, exc: MemoryError):
 
 async def rate_limit_error_handler(request: Request, exc: Exception):
     """Handler for rate limiting errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = f"Rate limit exceeded: {str(exc)}"
-    log_error(request_id, "RateLimitError", error_message, exc_info=False)
-    
-    # Track rate limit error for monitoring
-    await track_error(ErrorTypes.RATE_LIMIT, error_message, request_id)
+    enqueue_error(request_id, "RateLimitError", error_message, exc_info=False, track_type=ErrorTypes.RATE_LIMIT)
     
-    return JSONResponse(
+    return ErrorJSONResponse(
         status_code=429,
         content=create_error_response(
             code="RATE_LIMIT_EXCEEDED",
@@ -332,29 +399,72 @@ limiter = Limiter(key_func=get_remote_address)
 
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
     """Handler for rate limiting exceeded errors"""
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+    request_id = _get_rid(request)
     
     error_message = f"Rate limit exceeded for {get_remote_address(request)}"
-    log_error(request_id, "RateLimitExceeded", error_message, exc_info=False)
+    enqueue_error(request_id, "RateLimitExceeded", error_message, exc_info=False, track_type=ErrorTypes.RATE_LIMIT)
     
-    # Track rate limit error for monitoring
-    await track_error(ErrorTypes.RATE_LIMIT, error_message, request_id)
-    
-    return JSONResponse(
-        status_code=429,
-        content=create_error_response(
-            code="RATE_LIMIT_EXCEEDED",
-            message="Too many requests, please try again later",
-            status_code=429,
-            request_id=request_id,
-            details={
-                "retry_after": exc.retry_after,
-                "limit": exc.detail
-            }
+    return Response(
+        content=_render_error_template(
+            _RATE_LIMIT_TEMPLATE, request_id,
+            retry_after=exc.retry_after, limit=exc.detail
         ),
+        status_code=429,
+        media_type="application/json",
         headers={"Retry-After": str(exc.retry_after)}
     )
 
+# Built-in exceptions handled by ExceptionDispatchMiddleware rather than Starlette's registry
+_BUILTIN_EXCEPTION_HANDLERS = {
+    FileNotFoundError: file_not_found_error_handler,
+    PermissionError: permission_error_handler,
+    TimeoutError: timeout_error_handler,
+    ConnectionError: connection_error_handler,
+    MemoryError: memory_error_handler,
+}
+
+class ExceptionDispatchMiddleware:
+    """Pure ASGI middleware mapping exceptions to handlers with a dict lookup on the exact type"""
+    
+    def __init__(self, app: ASGIApp, handlers: Optional[Dict[type, Any]] = None):
+        self.app = app
+        self._handlers = dict(handlers if handlers is not None else _BUILTIN_EXCEPTION_HANDLERS)
+    
+    def _lookup(self, exc_type: type):
+        """Find the handler for exc_type, caching MRO fallbacks (and misses) by exact type"""
+        handler = self._handlers.get(exc_type)
+        if handler is None:
+            handler = False
+            for base in exc_type.__mro__[1:]:
+                if self._handlers.get(base):
+                    handler = self._handlers[base]
+                    break
+            self._handlers[exc_type] = handler
+        return handler
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            handler = self._lookup(type(exc))
+            # Unknown exceptions (and ones raised mid-response) go on to the global handler
+            if not handler or response_started:
+                raise
+            response = await handler(Request(scope, receive), exc)
+            await response(scope, receive, send)
+
 def register_error_handlers(app: FastAPI):
     """Register all error handlers with the FastAPI application"""
     
@@ -364,11 +474,7 @@ def register_error_handlers(app: FastAPI):
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(StarletteHTTPException, http_exception_handler)
     app.add_exception_handler(HTTPException, http_exception_handler)
-    app.add_exception_handler(FileNotFoundError, file_not_found_error_handler)
-    app.add_exception_handler(PermissionError, permission_error_handler)
-    app.add_exception_handler(TimeoutError, timeout_error_handler)
-    app.add_exception_handler(ConnectionError, connection_error_handler)
-    app.add_exception_handler(MemoryError, memory_error_handler)
+    # Built-in OS/runtime exceptions are dispatched by ExceptionDispatchMiddleware instead
     app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
     app.add_exception_handler(Exception, global_exception_handler)
     
@@ -379,44 +485,73 @@ def register_error_handlers(app: FastAPI):
     logging.info("Error handlers registered successfully")
 
 # Request ID middleware
-async def request_id_middleware(request: Request, call_next):
-    """Middleware to generate and attach request ID to all requests"""
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-    
-    response = await call_next(request)
+class RequestIDMiddleware:
+    """Pure ASGI middleware that generates a request ID and echoes it in X-Request-ID"""
     
-    # Add request ID to response headers for tracing
-    response.headers["X-Request-ID"] = request_id
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = uuid.uuid4().hex
+        # request.state reads from scope["state"], so handlers still see request.state.request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                # Add request ID to response headers for tracing
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode()))
+                message["headers"] = headers
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
 
 # Request logging middleware
-async def request_logging_middleware(request: Request, call_next):
-    """Middleware to log all incoming requests and responses"""
-    from app.utils.logger import log_request, log_response
-    import time
-    
-    request_id = getattr(request.state, 'request_id', str(uuid.uuid4()))
+class RequestLoggingMiddleware:
+    """Pure ASGI middleware that times each request, emits X-Response-Time and logs the response"""
     
-    # Log the incoming request
-    user_id = None  # Extract from auth if available
-    log_request(request_id, request.method, str(request.url), user_id)
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    # Process the request and measure time
-    start_time = time.time()
-    try:
-        response = await call_next(request)
-        duration_ms = (time.time() - start_time) * 1000
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = scope.get("state", {}).get("request_id") or _rid_pool_pop()
+        
+        # Log the incoming request
+        user_id = None  # Extract from auth if available
+        log_request(request_id, scope["method"], str(URL(scope=scope)), user_id)
         
-        # Log the response
-        response_size = int(response.headers.get("content-length", 0))
-        log_response(request_id, response.status_code, duration_ms, response_size)
+        start_time = time.perf_counter()
+        response_started = False
         
-        return response
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                # Duration is measured once, when the response starts
+                response_started = True
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                headers = list(message.get("headers", []))
+                response_size = 0
+                for name, value in headers:
+                    if name == b"content-length":
+                        response_size = int(value)
+                        break
+                headers.append((b"x-response-time", f"{duration_ms:.2f}".encode()))
+                message["headers"] = headers
+                enqueue_response(request_id, message["status"], duration_ms, response_size)
+            await send(message)
         
-    except Exception as exc:
-        duration_ms = (time.time() - start_time) * 1000
-        # Error will be handled by exception handlers, but we log the failed attempt
-        log_response(request_id, 500, duration_ms, 0)
-        raise
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            # Error will be handled by exception handlers, but we log the failed attempt
+            if not response_started:
+                enqueue_response(request_id, 500, (time.perf_counter() - start_time) * 1000, 0)
+            raise
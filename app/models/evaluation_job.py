@@ -1,9 +1,10 @@
 # modelwhiz-backend/app/models/evaluation_job.py
 
-from sqlalchemy import Column, Integer, String, JSON, DateTime, Enum as SQLAlchemyEnum, ForeignKey
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..db.database import Base
 import enum
+from datetime import datetime
 from sqlalchemy.orm import relationship
 
 class JobStatus(str, enum.Enum):
@@ -12,15 +13,20 @@ class JobStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
+_TERMINAL_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED})
+
 class EvaluationJob(Base):
     __tablename__ = "evaluation_jobs"
+    # Same name as the definition in db/indexes.py so the two never create duplicates
+    __table_args__ = (Index("idx_evaluation_jobs_status", "status"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, index=True, nullable=False)
     model_name = Column(String, nullable=False)
     model_id = Column(Integer, ForeignKey("ml_models.id"), nullable=False)
 
-    status = Column(SQLAlchemyEnum(JobStatus), default=JobStatus.PENDING)
+    # Plain string column; JobStatus is enforced at the application layer
+    status = Column(String(16), default=JobStatus.PENDING.value, nullable=False)
     task_id = Column(String, nullable=True, index=True)  # Celery task ID for tracking
     results = Column(JSON, nullable=True)
     artifacts = Column(JSON, nullable=True)
@@ -32,28 +38,31 @@ class EvaluationJob(Base):
     model = relationship("MLModel", back_populates="evaluation_jobs")
     
     def to_dict(self):
-        """Convert SQLAlchemy model to dictionary for serialization"""
+        """Convert SQLAlchemy model to dictionary for serialization
+        
+        Datetimes are returned as-is; orjson (ORJSONResponse / OPT_UTC_Z)
+        encodes them natively.
+        """
         return {
             "id": self.id,
             "user_id": self.user_id,
             "model_name": self.model_name,
             "model_id": self.model_id,
-            "status": self.status.value if self.status else None,
+            "status": self.status,
             "task_id": self.task_id,
             "results": self.results,
             "artifacts": self.artifacts,
             "error_message": self.error_message,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+            "created_at": self.created_at,
+            "completed_at": self.completed_at
         }
     
     def update_status(self, new_status: JobStatus, task_id: str = None, error_message: str = None):
         """Update job status and related fields"""
-        self.status = new_status
+        self.status = new_status.value
         if task_id:
             self.task_id = task_id
         if error_message:
             self.error_message = error_message
-        if new_status in [JobStatus.COMPLETED, JobStatus.FAILED]:
-            from datetime import datetime
+        if new_status in _TERMINAL_STATUSES:
             self.completed_at = datetime.utcnow()
\ No newline at end of file
@@ -1,6 +1,7 @@
 # modelwhiz-backend/app/models/metric.py
 
 from sqlalchemy import Column, Integer, ForeignKey, DateTime, JSON # <-- Import JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from ..db.database import Base
 from sqlalchemy.orm import relationship
@@ -10,7 +11,8 @@ class Metric(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     model_id = Column(Integer, ForeignKey("ml_models.id"))
-    values = Column(JSON, nullable=False)
+    # Binary JSONB on PostgreSQL; plain JSON keeps the SQLite dev fallback working
+    values = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
 
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,12 +1,17 @@
 # modelwhiz-backend/app/models/model.py
 
-from sqlalchemy import Column, Integer, String, DateTime, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from ..db.database import Base
 from sqlalchemy.orm import relationship
 
 class MLModel(Base):
     __tablename__ = "ml_models"
+    # GIN index for containment filters (latest_metrics @> '{...}'); PostgreSQL only
+    __table_args__ = (
+        Index("ix_ml_models_latest_metrics_gin", "latest_metrics", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, index=True)
@@ -14,20 +19,23 @@ class MLModel(Base):
     version = Column(String, default="v1")
     filename = Column(String)
     upload_time = Column(DateTime, default=datetime.utcnow)
-    latest_metrics = Column(JSON, nullable=True)
+    latest_metrics = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     task_type = Column(String, nullable=True)  # Will store 'classification' or 'regression'
     metrics = relationship("Metric", back_populates="model", cascade="all, delete-orphan")
     evaluation_jobs = relationship("EvaluationJob", back_populates="model", cascade="all, delete-orphan")
     
     def to_dict(self):
-        """Convert SQLAlchemy model to dictionary for serialization"""
+        """Convert SQLAlchemy model to dictionary for serialization
+        
+        upload_time is returned as a datetime; orjson encodes it natively.
+        """
         return {
             "id": self.id,
             "user_id": self.user_id,
             "name": self.name,
             "version": self.version,
             "filename": self.filename,
-            "upload_time": self.upload_time.isoformat() if self.upload_time else None,
+            "upload_time": self.upload_time,
             "latest_metrics": self.latest_metrics,
             "task_type": self.task_type
         }
\ No newline at end of file
@@ -20,13 +20,7 @@ class ModelResponse(BaseModel):
     task_type: Optional[str] = None
     metrics: Optional[List[MetricOut]] = None
 
-    model_config = ConfigDict(
-        from_attributes=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat() if v else None,
-        },
-        exclude_none=True
-    )
+    model_config = ConfigDict(from_attributes=True)
 
 class ModelDashboardOut(BaseModel):
     id: int
@@ -39,13 +33,7 @@ class ModelDashboardOut(BaseModel):
     task_type: Optional[str] = None
     # metrics: Optional[List[MetricOut]] = []
 
-    model_config = ConfigDict(
-        from_attributes=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat() if v else None,
-        },
-        exclude_none=True
-    )
+    model_config = ConfigDict(from_attributes=True)
 
 class ModelListResponse(BaseModel):
     id: int
@@ -53,12 +41,7 @@ class ModelListResponse(BaseModel):
     version: str
     upload_time: datetime
 
-    model_config = ConfigDict(
-        from_attributes=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat() if v else None,
-        }
-    )
+    model_config = ConfigDict(from_attributes=True)
 
 class ModelDetailResponse(BaseModel):
     id: int
@@ -87,10 +70,4 @@ class ModelUpdate(BaseModel):
     model_type: Optional[str] = None
     # Add other updateable fields
     
-    model_config = ConfigDict(
-        from_attributes=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat() if v else None,
-        },
-        exclude_none=True
-    )
+    model_config = ConfigDict(from_attributes=True)
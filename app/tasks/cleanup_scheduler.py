@@ -1,16 +1,24 @@
 import asyncio
 import logging
+import random
 from datetime import datetime, timedelta
 from typing import Dict, Any
 from ..utils.file_cleanup import cleanup_old_files, get_storage_usage, emergency_cleanup
 from ..utils.storage_monitor import StorageMonitor
+from ..utils.time_utils import utcnow_iso_z
 
 logger = logging.getLogger(__name__)
 
 class CleanupScheduler:
+    # Retry delays (seconds) after a failed monitoring run
+    BASE_BACKOFF = 60
+    MAX_BACKOFF = 3600
+    
     def __init__(self):
         self.storage_monitor = StorageMonitor()
         self.is_running = False
+        self._tasks = []
+        self._backoff = self.BASE_BACKOFF
         
     async def daily_cleanup_task(self):
         """Run daily cleanup of old files"""
@@ -29,7 +37,7 @@ class CleanupScheduler:
             return {
                 "cleanup_result": result,
                 "storage_status": storage_status,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utcnow_iso_z()
             }
         except Exception as e:
             logger.error(f"Daily cleanup task failed: {str(e)}")
@@ -40,8 +48,8 @@ class CleanupScheduler:
         try:
             logger.info("Starting hourly storage monitoring...")
             
-            # Get storage usage (this is a sync function, don't await it)
-            usage_info = get_storage_usage()
+            # get_storage_usage is blocking - run it off the event loop
+            usage_info = await asyncio.to_thread(get_storage_usage)
             
             # Check if emergency cleanup is needed
             if usage_info.get("alert_level") == "critical":
@@ -57,12 +65,51 @@ class CleanupScheduler:
             return {
                 "usage_info": usage_info,
                 "report": report,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utcnow_iso_z()
             }
         except Exception as e:
             logger.error(f"Hourly monitoring task failed: {str(e)}")
             raise
     
+    async def _sleep_with_backoff(self):
+        """Sleep for the current backoff plus jitter, then double it up to MAX_BACKOFF"""
+        await asyncio.sleep(self._backoff + random.uniform(0, self._backoff / 2))
+        self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+    
+    @staticmethod
+    def _seconds_until(next_run: datetime) -> float:
+        """Seconds from now (UTC) until next_run"""
+        return max((next_run - datetime.utcnow()).total_seconds(), 0)
+    
+    async def _hourly_loop(self):
+        """Run monitoring now, then at the top of every hour"""
+        while self.is_running:
+            try:
+                await self.hourly_monitoring_task()
+                self._backoff = self.BASE_BACKOFF
+            except Exception as e:
+                logger.error(f"Scheduler task error: {str(e)}")
+                await self._sleep_with_backoff()
+                continue
+            
+            now = datetime.utcnow()
+            next_run = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            await asyncio.sleep(self._seconds_until(next_run))
+    
+    async def _daily_loop(self):
+        """Sleep until the next 02:00 UTC and run the daily cleanup"""
+        while self.is_running:
+            now = datetime.utcnow()
+            next_run = now.replace(hour=2, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            await asyncio.sleep(self._seconds_until(next_run))
+            
+            try:
+                await self.daily_cleanup_task()
+            except Exception as e:
+                logger.error(f"Scheduler task error: {str(e)}")
+    
     async def start_scheduler(self):
         """Start the cleanup scheduler"""
         if self.is_running:
@@ -75,33 +122,23 @@ class CleanupScheduler:
         try:
             # Run initial cleanup
             await self.daily_cleanup_task()
-            
-            # Set up periodic tasks
-            while self.is_running:
-                try:
-                    # Run hourly monitoring
-                    await self.hourly_monitoring_task()
-                    
-                    # Check if it's time for daily cleanup (run at 2 AM)
-                    now = datetime.now()
-                    if now.hour == 2 and now.minute < 5:  # Run between 2:00-2:04 AM
-                        await self.daily_cleanup_task()
-                    
-                    # Wait for 1 hour
-                    await asyncio.sleep(3600)
-                    
-                except Exception as e:
-                    logger.error(f"Scheduler task error: {str(e)}")
-                    await asyncio.sleep(300)  # Wait 5 minutes before retrying
-                    
         except Exception as e:
             logger.error(f"Cleanup scheduler failed: {str(e)}")
             self.is_running = False
             raise
+        
+        # Each loop sleeps exactly until its next run instead of polling
+        self._tasks = [
+            asyncio.create_task(self._hourly_loop()),
+            asyncio.create_task(self._daily_loop()),
+        ]
     
     async def stop_scheduler(self):
         """Stop the cleanup scheduler"""
         self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
         logger.info("Cleanup scheduler stopped")
 
 # Global scheduler instance
@@ -0,0 +1,118 @@
+"""
+Background error event bus for ModelWhiz backend
+Moves error logging, monitoring and response logging off the response path by flushing events in batches
+"""
+
+import asyncio
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+from .logger import get_logger, log_error, log_response
+from .error_monitor import track_error
+
+logger = get_logger()
+
+MAX_QUEUE_SIZE = 10000
+MAX_BATCH_SIZE = 256
+
+_queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=MAX_QUEUE_SIZE)
+_consumer_task: Optional[asyncio.Task] = None
+# Queued behind pending events to stop the consumer once they are flushed
+_STOP = object()
+# Fallback flushes in flight; the loop only keeps weak references to tasks
+_pending_flushes: Set[asyncio.Task] = set()
+
+def enqueue(event: Dict[str, Any]) -> None:
+    """Queue an event for the background consumer without awaiting"""
+    if _consumer_task is None:
+        # Bus not started (e.g. scripts or early startup) - flush on the running loop instead
+        try:
+            task = asyncio.get_running_loop().create_task(_flush_batch([event]))
+        except RuntimeError:
+            return
+        _pending_flushes.add(task)
+        task.add_done_callback(_pending_flushes.discard)
+        return
+
+    try:
+        _queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Never block the response path; keep error log lines but skip monitoring
+        if event.get("kind") == "error":
+            log_error(event["rid"] or "system", event["type"], event["msg"])
+
+def enqueue_error(request_id: str, error_type: str, error_message: str,
+                  exc_info: bool = False, track_type: Optional[str] = None) -> None:
+    """Queue an error for logging and, when track_type is given, error monitoring"""
+    enqueue({
+        "kind": "error",
+        "rid": request_id,
+        "type": error_type,
+        "msg": error_message,
+        # The traceback must be captured now; it is gone by the time the consumer runs
+        "exc_info": sys.exc_info() if exc_info else None,
+        "track": track_type,
+    })
+
+def enqueue_response(request_id: str, status_code: int, duration_ms: float, response_size: int) -> None:
+    """Queue a response log line"""
+    enqueue({
+        "kind": "response",
+        "rid": request_id,
+        "status": status_code,
+        "duration_ms": duration_ms,
+        "size": response_size,
+    })
+
+async def _flush_batch(batch: List[Dict[str, Any]]):
+    """Process a batch of queued events"""
+    for event in batch:
+        try:
+            if event.get("kind") == "error":
+                log_error(event["rid"], event["type"], event["msg"], exc_info=event["exc_info"] or False)
+                if event["track"]:
+                    await track_error(event["track"], event["msg"], event["rid"])
+            elif event.get("kind") == "response":
+                log_response(event["rid"], event["status"], event["duration_ms"], event["size"])
+        except Exception as e:
+            logger.warning(f"Error bus failed to process event: {e}")
+
+async def _drain():
+    """Consume events, batching whatever is already queued behind the first one"""
+    while True:
+        batch = [await _queue.get()]
+        while len(batch) < MAX_BATCH_SIZE and not _queue.empty():
+            batch.append(_queue.get_nowait())
+        stop = any(event is _STOP for event in batch)
+        if stop:
+            batch = [event for event in batch if event is not _STOP]
+        await _flush_batch(batch)
+        if stop:
+            return
+
+def start_error_bus():
+    """Start the background consumer (call from application startup)"""
+    global _consumer_task
+    if _consumer_task is None:
+        _consumer_task = asyncio.create_task(_drain())
+
+async def stop_error_bus():
+    """Stop the consumer and flush anything still queued"""
+    global _consumer_task
+    if _consumer_task is not None:
+        if not _consumer_task.done():
+            # A sentinel rather than cancel(), so a batch mid-flush is not lost
+            await _queue.put(_STOP)
+            try:
+                await _consumer_task
+            except Exception as e:
+                logger.warning(f"Error bus consumer failed: {e}")
+        _consumer_task = None
+
+    remaining = []
+    while not _queue.empty():
+        remaining.append(_queue.get_nowait())
+    if remaining:
+        await _flush_batch(remaining)
+    if _pending_flushes:
+        await asyncio.gather(*_pending_flushes, return_exceptions=True)
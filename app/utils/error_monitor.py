@@ -4,13 +4,15 @@ Tracks error rates, patterns, and triggers alerts for critical errors
 """
 
 import asyncio
+import hashlib
 import time
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Set, Any
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 import logging
-import json
 import os
+import orjson
 from .logger import get_logger
 
 # Try to import Redis for persistent error tracking
@@ -21,14 +23,99 @@ except ImportError:
     REDIS_AVAILABLE = False
     cache_client = None
 
+# Prometheus is optional - Redis latency is only recorded when it is installed
+try:
+    from prometheus_client import Histogram
+    REDIS_LATENCY = Histogram(
+        "mw_redis_cmd_seconds",
+        "Latency of error-monitor Redis operations",
+        ["op"],
+        buckets=(.0005, .001, .002, .005, .01, .025, .05, .1, .25, 1)
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    REDIS_LATENCY = None
+    PROMETHEUS_AVAILABLE = False
+
+# msgpack is optional - error records fall back to plain stream fields without it
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+# Leading byte of packed records so the serializer can change later without breaking old entries
+RECORD_FORMAT_MSGPACK_V1 = b"\x01"
+
 logger = get_logger()
 
+SLACK_HEADERS = {"Content-Type": "application/json"}
+
+def _encode_error_record(error_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn an error record into stream fields: one packed field, or flat fields without msgpack"""
+    if MSGPACK_AVAILABLE:
+        return {"d": RECORD_FORMAT_MSGPACK_V1 + msgpack.packb(error_data, use_bin_type=True)}
+    fields = dict(error_data)
+    fields["request_id"] = fields["request_id"] or ""
+    return fields
+
+def _decode_error_record(fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+    """Inverse of _encode_error_record for either stored layout"""
+    packed = fields.get(b"d")
+    if packed is not None and packed[:1] == RECORD_FORMAT_MSGPACK_V1 and MSGPACK_AVAILABLE:
+        return msgpack.unpackb(packed[1:], raw=False)
+    error_data = {k.decode(): v.decode() for k, v in fields.items()}
+    error_data["timestamp"] = float(error_data["timestamp"])
+    error_data["request_id"] = error_data["request_id"] or None
+    return error_data
+
+@contextmanager
+def _timed(op: str):
+    """Observe the wall time of a Redis operation in the latency histogram"""
+    if REDIS_LATENCY is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REDIS_LATENCY.labels(op).observe(time.perf_counter() - start)
+
+# Set of every error type ever persisted, so stats and reset find types tracked by any process
+ERROR_TYPES_KEY = "error_types"
+
+# Per-minute error counters live for two minutes: the current bucket plus slack for late reads
+MINUTE_BUCKET_TTL = 120
+
+def _minute_key(error_type: str, minute: int) -> str:
+    """Redis hash counting error_type errors during one clock minute (epoch seconds // 60)"""
+    return f"error_stats:{error_type}:minute:{minute}"
+
+# Hourly error counters back the windowed stats; they outlive the largest window served
+ERROR_STATS_MAX_HOURS = 168
+HOUR_BUCKET_TTL = (ERROR_STATS_MAX_HOURS + 1) * 3600
+
+def _hour_key(error_type: str, hour: int) -> str:
+    """Redis hash counting error_type errors during one clock hour (epoch seconds // 3600)"""
+    return f"error_stats:{error_type}:hour:{hour}"
+
+ALERT_MESSAGE_TEMPLATE = (
+    "🚨 {level} ALERT: {error_type} errors detected\n"
+    "Count: {count} errors in last minute\n"
+    "Patterns: {patterns}\n"
+    "Time: {timestamp}\n"
+    "Environment: {environment}"
+)
+
 class ErrorMonitor:
     """Monitors error rates and patterns for alerting with Redis persistence"""
     
     def __init__(self):
         self.error_counts = defaultdict(int)
-        self.error_timestamps = defaultdict(list)
+        self.error_timestamps = defaultdict(deque)
+        # Per-second ring over the last minute: [counts, second each slot belongs to]
+        self._minute_buckets = defaultdict(lambda: ([0] * 60, [0] * 60))
         self.alert_thresholds = {
             "critical": int(os.getenv("ERROR_ALERT_CRITICAL", "10")),  # 10 errors per minute
             "warning": int(os.getenv("ERROR_ALERT_WARNING", "5")),     # 5 errors per minute
@@ -36,34 +123,85 @@ class ErrorMonitor:
         }
         self.alert_cooldown = int(os.getenv("ERROR_ALERT_COOLDOWN", "300"))  # 5 minutes
         self.last_alert_time = {}
-        self.error_patterns = defaultdict(set)
+        # Small per-type LRU of recent patterns for local display; ranking lives in Redis
+        self.error_patterns = defaultdict(OrderedDict)
+        self.max_local_patterns = 32
+        # TOPK.* needs the RedisBloom module, so approximate top-K is opt-in
+        self.topk_enabled = os.getenv("ERROR_TOPK_ENABLED", "false").lower() == "true"
+        self._topk_reserved: Set[str] = set()
         self.redis_enabled = REDIS_AVAILABLE
         
+        # Buffered Redis writes: track_error enqueues, a background task flushes in batches
+        self.batch_size = int(os.getenv("ERROR_FLUSH_BATCH_SIZE", "256"))
+        self.flush_interval = int(os.getenv("ERROR_FLUSH_INTERVAL_MS", "100")) / 1000
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._flusher_task: Optional[asyncio.Task] = None
+        self.stream_maxlen = int(os.getenv("ERROR_STREAM_MAXLEN", "10000"))
+        
+        # Read once here rather than on every tracked error or alert
+        self._environment = os.getenv("ENVIRONMENT", "development")
+        self._slack_webhook = os.getenv("SLACK_WEBHOOK_URL")
+        alert_emails = os.getenv("ALERT_EMAILS")
+        self._alert_emails = alert_emails.split(",") if alert_emails else None
+        
+        # Shared HTTP session for alert webhooks, created lazily on the running loop
+        self._http = None
+        
+        # Slack payload serialized once; quoted "__NAME__" sentinels are swapped per alert
+        self._slack_template = orjson.dumps({
+            "text": "__TEXT__",
+            "blocks": [
+                {
+                    "type": "section",
+                    "text": {"type": "mrkdwn", "text": "__HEADLINE__"}
+                },
+                {
+                    "type": "section",
+                    "fields": [
+                        {"type": "mrkdwn", "text": "__COUNT__"},
+                        {"type": "mrkdwn", "text": "__ENVIRONMENT__"}
+                    ]
+                },
+                {
+                    "type": "section",
+                    "text": {"type": "mrkdwn", "text": "__TIME__"}
+                }
+            ]
+        })
+        
     async def track_error(self, error_type: str, error_message: str, request_id: Optional[str] = None):
         """Track an error occurrence with Redis persistence"""
         current_time = time.time()
         
         # Update in-memory counters
         self.error_counts[error_type] += 1
-        self.error_timestamps[error_type].append(current_time)
+        self._bump_minute_bucket(error_type, current_time)
         
-        # Clean up old timestamps (keep last hour)
+        # Append and expire old timestamps from the left (keep last hour)
+        timestamps = self.error_timestamps[error_type]
+        timestamps.append(current_time)
         cutoff = current_time - 3600
-        self.error_timestamps[error_type] = [
-            ts for ts in self.error_timestamps[error_type] if ts > cutoff
-        ]
+        while timestamps and timestamps[0] <= cutoff:
+            timestamps.popleft()
         
         # Track error patterns
         if error_message:
             pattern_key = error_message[:200]  # First 200 chars for better pattern matching
-            self.error_patterns[error_type].add(pattern_key)
+            patterns = self.error_patterns[error_type]
+            patterns[pattern_key] = None
+            patterns.move_to_end(pattern_key)
+            if len(patterns) > self.max_local_patterns:
+                patterns.popitem(last=False)
         
-        # Persist to Redis if available
+        # Queue for batched Redis persistence if available
         if self.redis_enabled:
-            await self._persist_to_redis(error_type, current_time, error_message, request_id)
+            self._ensure_flusher()
+            self._queue.put_nowait((error_type, current_time, error_message, request_id))
         
-        # Check if alert should be triggered
-        await self._check_alert_conditions(error_type)
+        # Check if alert should be triggered; with Redis the flusher does this from the
+        # shared counters once the error is persisted
+        if not self.redis_enabled:
+            await self._check_alert_conditions(error_type)
         
         # Log the error
         logger.log_error(
@@ -73,45 +211,198 @@ class ErrorMonitor:
             exc_info=False
         )
     
-    async def _persist_to_redis(self, error_type: str, timestamp: float, 
-                               error_message: str, request_id: Optional[str] = None):
-        """Persist error data to Redis for long-term storage and analysis"""
+    def _ensure_flusher(self):
+        """Start the background Redis flusher on the running loop if needed"""
+        if self._flusher_task is None or self._flusher_task.done():
+            self._flusher_task = asyncio.get_running_loop().create_task(self._flush_loop())
+    
+    async def _flush_loop(self):
+        """Drain queued errors every batch_size events or flush_interval seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                # Don't lose a half-written batch if the flusher is cancelled mid-flight
+                await asyncio.shield(self._persist_to_redis(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _persist_to_redis(self, batch: List[tuple]):
+        """Persist a batch of error records to Redis for long-term storage and analysis"""
         try:
-            error_data = {
-                "type": error_type,
-                "timestamp": timestamp,
-                "message": error_message[:500],  # Limit message length
-                "request_id": request_id,
-                "environment": os.getenv("ENVIRONMENT", "development")
-            }
+            environment = self._environment
+            counts: Dict[str, int] = defaultdict(int)
+            minute_counts: Dict[tuple, int] = defaultdict(int)
+            hour_counts: Dict[tuple, int] = defaultdict(int)
             
-            # Store individual error record
-            error_key = f"error:{error_type}:{int(timestamp * 1000)}"
-            await cache_client.set(error_key, error_data, ttl=86400)  # 24 hours
+            async with cache_client.client.pipeline(transaction=True) as pipe:
+                for error_type, timestamp, error_message, request_id in batch:
+                    # Stream entry IDs are millisecond timestamps, so XADD also gives us time ordering
+                    pipe.xadd(
+                        f"error_stream:{error_type}",
+                        _encode_error_record({
+                            "type": error_type,
+                            "timestamp": timestamp,
+                            "message": error_message[:500],  # Limit message length
+                            "request_id": request_id,
+                            "environment": environment
+                        }),
+                        maxlen=self.stream_maxlen,
+                        approximate=True
+                    )
+                    counts[error_type] += 1
+                    minute_counts[error_type, int(timestamp) // 60] += 1
+                    hour_counts[error_type, int(timestamp) // 3600] += 1
+                    if error_message:
+                        # Fixed-size HLL per type counts distinct patterns without storing them
+                        pattern_hash = hashlib.blake2b(error_message[:200].encode(), digest_size=16).digest()
+                        pipe.pfadd(f"err_hll:{error_type}", pattern_hash)
+                
+                pipe.sadd(ERROR_TYPES_KEY, *counts)
+                # One counter update per error type rather than per error
+                for error_type, delta in counts.items():
+                    pipe.hincrby(f"error_stats:{error_type}", "total_count", delta)
+                # Fixed per-minute buckets: each key counts one clock minute and then expires,
+                # so a steady error stream can't keep a sliding TTL alive forever
+                # type -> (minute, pipeline index of that minute's HINCRBY) for the newest bucket
+                latest_minute: Dict[str, tuple] = {}
+                for (error_type, minute), delta in minute_counts.items():
+                    minute_key = _minute_key(error_type, minute)
+                    if minute >= latest_minute.get(error_type, (-1,))[0]:
+                        latest_minute[error_type] = (minute, len(pipe))
+                    pipe.hincrby(minute_key, "minute_count", delta)
+                    pipe.expire(minute_key, MINUTE_BUCKET_TTL)
+                for (error_type, hour), delta in hour_counts.items():
+                    hour_key = _hour_key(error_type, hour)
+                    pipe.hincrby(hour_key, "hour_count", delta)
+                    pipe.expire(hour_key, HOUR_BUCKET_TTL)
+                with _timed("persist_errors"):
+                    results = await pipe.execute()
             
-            # Update error counters in Redis
-            counter_key = f"error_stats:{error_type}"
-            await cache_client.client.hincrby(counter_key, "total_count", 1)
-            await cache_client.client.hincrby(counter_key, "minute_count", 1)
+            # HINCRBY returned each type's updated minute count (this batch and every other
+            # process's errors included), so alerts need no extra round-trip
+            for error_type, (_, index) in latest_minute.items():
+                await self._alert_on_rate(error_type, int(results[index]))
             
-            # Set TTL for minute counter (reset after 60 seconds)
-            await cache_client.client.expire(f"error_stats:{error_type}:minute", 60)
+            if self.topk_enabled:
+                await self._add_topk_patterns(batch)
             
         except Exception as e:
             logger.log_error("system", "redis_persistence_error", 
-                           f"Failed to persist error to Redis: {e}", exc_info=True)
+                           f"Failed to persist {len(batch)} errors to Redis: {e}", exc_info=True)
+    
+    async def _add_topk_patterns(self, batch: List[tuple]):
+        """Feed message patterns to the per-type Redis top-K sketch"""
+        patterns: Dict[str, List[str]] = defaultdict(list)
+        for error_type, _, error_message, _ in batch:
+            if error_message:
+                patterns[error_type].append(error_message[:200])
+        if not patterns:
+            return
+        
+        try:
+            # Kept outside the MULTI/EXEC above so a missing module can't abort the core writes
+            async with cache_client.client.pipeline(transaction=False) as pipe:
+                for error_type, items in patterns.items():
+                    key = f"err_topk:{error_type}"
+                    if key not in self._topk_reserved:
+                        # Fails harmlessly if the sketch already exists
+                        pipe.execute_command("TOPK.RESERVE", key, 10)
+                        self._topk_reserved.add(key)
+                    pipe.execute_command("TOPK.ADD", key, *items)
+                with _timed("topk_add"):
+                    results = await pipe.execute(raise_on_error=False)
+            
+            if any(isinstance(r, Exception) and "unknown command" in str(r).lower() for r in results):
+                self.topk_enabled = False
+                logger.warning("Redis TOPK commands unavailable, falling back to local error patterns")
+        except Exception as e:
+            logger.warning(f"Failed to update error pattern top-K: {e}")
+    
+    async def _get_pattern_summary(self, error_type: str) -> tuple:
+        """Top patterns and approximate distinct-pattern count for an error type"""
+        patterns = list(reversed(self.error_patterns[error_type]))[:10]  # Most recent 10
+        distinct = len(self.error_patterns[error_type])
+        if not self.redis_enabled:
+            return patterns, distinct
+        
+        try:
+            with _timed("pattern_count"):
+                distinct = await cache_client.client.pfcount(f"err_hll:{error_type}")
+            if self.topk_enabled:
+                with _timed("topk_list"):
+                    top = await cache_client.client.execute_command("TOPK.LIST", f"err_topk:{error_type}")
+                if top:
+                    patterns = [p.decode() if isinstance(p, bytes) else p for p in top if p]
+        except Exception:
+            pass
+        return patterns, distinct
+    
+    async def close(self):
+        """Flush queued errors to Redis, stop the background flusher and close the HTTP session"""
+        if self._flusher_task is not None:
+            if not self._flusher_task.done():
+                await self._queue.join()
+                self._flusher_task.cancel()
+                try:
+                    await self._flusher_task
+                except asyncio.CancelledError:
+                    pass
+            self._flusher_task = None
+        
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+    
+    def _bump_minute_bucket(self, error_type: str, timestamp: float):
+        """Count an error in its one-second slot, zeroing slots left over from a previous minute"""
+        second = int(timestamp)
+        slot = second % 60
+        counts, seconds = self._minute_buckets[error_type]
+        if seconds[slot] != second:
+            seconds[slot] = second
+            counts[slot] = 0
+        counts[slot] += 1
+    
+    def _minute_count(self, error_type: str, timestamp: float) -> int:
+        """Errors in the last 60 seconds, read from the ring without touching timestamps"""
+        if error_type not in self._minute_buckets:
+            return 0
+        oldest = int(timestamp) - 60
+        counts, seconds = self._minute_buckets[error_type]
+        return sum(count for count, second in zip(counts, seconds) if second > oldest)
+    
+    @staticmethod
+    def _recent(timestamps: deque, cutoff: float) -> List[float]:
+        """Timestamps newer than cutoff, walking back from the newest"""
+        recent = []
+        for ts in reversed(timestamps):
+            if ts <= cutoff:
+                break
+            recent.append(ts)
+        return recent
     
     async def _check_alert_conditions(self, error_type: str):
-        """Check if error rate exceeds thresholds and trigger alerts"""
+        """Check the in-memory error rate against the alert thresholds"""
+        await self._alert_on_rate(error_type, self._minute_count(error_type, time.time()))
+    
+    async def _alert_on_rate(self, error_type: str, recent_errors: int):
+        """Trigger an alert if recent_errors (errors this minute) crosses a threshold"""
         current_time = time.time()
         
-        # Get error rate from Redis if available, otherwise use in-memory
-        if self.redis_enabled:
-            recent_errors = await self._get_redis_error_rate(error_type)
-        else:
-            timestamps = self.error_timestamps[error_type]
-            minute_ago = current_time - 60
-            recent_errors = len([ts for ts in timestamps if ts > minute_ago])
+        last_alert = self.last_alert_time.get(error_type, 0)
+        if (current_time - last_alert) <= self.alert_cooldown:
+            return
         
         # Check thresholds
         alert_level = None
@@ -120,40 +411,32 @@ class ErrorMonitor:
         elif recent_errors >= self.alert_thresholds["warning"]:
             alert_level = "warning"
         
-        # Check cooldown
-        last_alert = self.last_alert_time.get(error_type, 0)
-        if alert_level and (current_time - last_alert) > self.alert_cooldown:
+        if alert_level:
             await self._trigger_alert(error_type, alert_level, recent_errors)
             self.last_alert_time[error_type] = current_time
     
-    async def _get_redis_error_rate(self, error_type: str) -> int:
-        """Get error rate from Redis"""
-        try:
-            count = await cache_client.client.hget(f"error_stats:{error_type}", "minute_count")
-            return int(count) if count else 0
-        except Exception:
-            return 0
-    
     async def _trigger_alert(self, error_type: str, level: str, count: int):
         """Trigger an error alert with external integrations"""
-        patterns = list(self.error_patterns[error_type])[:10]  # Top 10 patterns
+        patterns, distinct_patterns = await self._get_pattern_summary(error_type)  # Top 10 patterns
         
         alert_data = {
             "level": level,
             "error_type": error_type,
             "count": count,
             "patterns": patterns,
+            "distinct_patterns": distinct_patterns,
             "timestamp": datetime.utcnow().isoformat(),
-            "environment": os.getenv("ENVIRONMENT", "development")
+            "environment": self._environment
         }
         
-        alert_message = (
-            f"🚨 {level.upper()} ALERT: {error_type} errors detected\n"
-            f"Count: {count} errors in last minute\n"
-            f"Patterns: {patterns}\n"
-            f"Time: {datetime.utcnow().isoformat()}\n"
-            f"Environment: {os.getenv('ENVIRONMENT', 'development')}"
-        )
+        alert_message = ALERT_MESSAGE_TEMPLATE.format_map({
+            "level": level.upper(),
+            "error_type": error_type,
+            "count": count,
+            "patterns": patterns,
+            "timestamp": alert_data["timestamp"],
+            "environment": self._environment
+        })
         
         # Log the alert
         logger.log_error(
@@ -171,50 +454,41 @@ class ErrorMonitor:
     async def _send_external_alerts(self, alert_data: Dict[str, Any]):
         """Send alerts to external services (Slack, Email, etc.)"""
         # Slack integration
-        slack_webhook = os.getenv("SLACK_WEBHOOK_URL")
-        if slack_webhook:
-            await self._send_slack_alert(alert_data, slack_webhook)
+        if self._slack_webhook:
+            await self._send_slack_alert(alert_data, self._slack_webhook)
         
         # Email integration
-        email_config = os.getenv("ALERT_EMAILS")
-        if email_config:
-            await self._send_email_alert(alert_data, email_config.split(','))
+        if self._alert_emails:
+            await self._send_email_alert(alert_data, self._alert_emails)
+    
+    async def _get_http(self):
+        """Return the shared keep-alive aiohttp session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            import aiohttp
+            
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
+        return self._http
     
     async def _send_slack_alert(self, alert_data: Dict[str, Any], webhook_url: str):
         """Send alert to Slack"""
         try:
-            import aiohttp
-            
-            message = {
-                "text": f"🚨 {alert_data['level'].upper()} Alert: {alert_data['error_type']}",
-                "blocks": [
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*🚨 {alert_data['level'].upper()} ALERT*: `{alert_data['error_type']}`"
-                        }
-                    },
-                    {
-                        "type": "section",
-                        "fields": [
-                            {"type": "mrkdwn", "text": f"*Count:*\n{alert_data['count']} errors/min"},
-                            {"type": "mrkdwn", "text": f"*Environment:*\n{alert_data['environment']}"}
-                        ]
-                    },
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*Time:* {alert_data['timestamp']}"
-                        }
-                    }
-                ]
-            }
+            message = self._slack_template
+            for name, value in (
+                ("TEXT", f"🚨 {alert_data['level'].upper()} Alert: {alert_data['error_type']}"),
+                ("HEADLINE", f"*🚨 {alert_data['level'].upper()} ALERT*: `{alert_data['error_type']}`"),
+                ("COUNT", f"*Count:*\n{alert_data['count']} errors/min"),
+                ("ENVIRONMENT", f"*Environment:*\n{alert_data['environment']}"),
+                ("TIME", f"*Time:* {alert_data['timestamp']}")
+            ):
+                message = message.replace(f'"__{name}__"'.encode(), orjson.dumps(value), 1)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(webhook_url, json=message):
-                    pass
+            session = await self._get_http()
+            async with session.post(webhook_url, data=message, headers=SLACK_HEADERS) as resp:
+                # Read the body so the connection goes back to the pool
+                await resp.read()
                     
         except Exception as e:
             logger.log_error("system", "slack_alert_error", 
@@ -232,41 +506,66 @@ class ErrorMonitor:
         stats = {}
         
         for error_type, timestamps in self.error_timestamps.items():
-            recent_timestamps = [ts for ts in timestamps if ts > cutoff]
+            recent_timestamps = self._recent(timestamps, cutoff)
             stats[error_type] = {
                 "total_count": len(recent_timestamps),
                 "rate_per_minute": len(recent_timestamps) / time_window_minutes,
-                "last_occurrence": max(recent_timestamps) if recent_timestamps else None,
-                "patterns": list(self.error_patterns[error_type])[:10],
+                "last_occurrence": recent_timestamps[0] if recent_timestamps else None,
+                "patterns": list(reversed(self.error_patterns[error_type]))[:10],
                 "redis_enabled": self.redis_enabled
             }
         
         return stats
     
+    async def _tracked_error_types(self) -> Set[str]:
+        """Error types with Redis keys: the persisted type set plus anything tracked locally"""
+        with _timed("error_types"):
+            members = await cache_client.client.smembers(ERROR_TYPES_KEY)
+        known = {m.decode() if isinstance(m, bytes) else m for m in members}
+        known.update(self.error_counts)
+        return known
+    
     async def get_redis_error_stats(self, time_window_hours: int = 24) -> Dict[str, Any]:
         """Get comprehensive error statistics from Redis"""
         if not self.redis_enabled:
             return {"redis_available": False}
         
         try:
-            # Get all error keys from Redis
-            error_keys = []
-            async for key in cache_client.client.scan_iter(match="error:*:*"):
-                error_keys.append(key)
+            error_types = sorted(await self._tracked_error_types())
+            now = time.time()
+            # Stream IDs start with the ms timestamp, so the window is a plain ID range
+            min_id = str(int((now - time_window_hours * 3600) * 1000))
+            # Counts come from the hourly buckets overlapping the window (hour granularity)
+            current_hour = int(now) // 3600
+            hours = range(current_hour - min(time_window_hours, ERROR_STATS_MAX_HOURS), current_hour + 1)
+            
+            async with cache_client.client.pipeline(transaction=False) as pipe:
+                for error_type in error_types:
+                    pipe.xrevrange(f"error_stream:{error_type}", max="+", min=min_id, count=100)
+                    for hour in hours:
+                        pipe.hget(_hour_key(error_type, hour), "hour_count")
+                with _timed("error_stats"):
+                    results = await pipe.execute()
             
             stats = {
-                "total_errors": len(error_keys),
+                "total_errors": 0,
                 "error_types": defaultdict(int),
                 "recent_errors": []
             }
             
-            # Get recent errors
-            recent_cutoff = time.time() - (time_window_hours * 3600)
-            for key in error_keys[-100:]:  # Last 100 errors
-                error_data = await cache_client.get(key)
-                if error_data and error_data.get("timestamp", 0) > recent_cutoff:
-                    stats["error_types"][error_data["type"]] += 1
-                    stats["recent_errors"].append(error_data)
+            per_type = 1 + len(hours)
+            for i, error_type in enumerate(error_types):
+                entries = results[i * per_type]
+                count = sum(int(c) for c in results[i * per_type + 1:(i + 1) * per_type] if c)
+                if count:
+                    stats["total_errors"] += count
+                    stats["error_types"][error_type] = count
+                for _, fields in entries:
+                    stats["recent_errors"].append(_decode_error_record(fields))
+            
+            # Newest first, capped like the per-type reads
+            stats["recent_errors"].sort(key=lambda e: e["timestamp"], reverse=True)
+            stats["recent_errors"] = stats["recent_errors"][:100]
             
             return stats
             
@@ -277,30 +576,65 @@ class ErrorMonitor:
     
     def get_error_rate(self, error_type: str, window_minutes: int = 1) -> float:
         """Get error rate for specific error type"""
-        cutoff = time.time() - (window_minutes * 60)
-        timestamps = self.error_timestamps[error_type]
-        recent_errors = len([ts for ts in timestamps if ts > cutoff])
+        current_time = time.time()
+        if window_minutes == 1:
+            return float(self._minute_count(error_type, current_time))
+        timestamps = self.error_timestamps.get(error_type)
+        if not timestamps:
+            return 0.0
+        recent_errors = len(self._recent(timestamps, current_time - (window_minutes * 60)))
         return recent_errors / window_minutes
     
     async def reset_error_counters(self):
         """Reset all error counters (for testing or maintenance)"""
+        # Collect Redis key types before the local counters are cleared
+        error_types = set(self.error_counts)
+        
         self.error_counts.clear()
         self.error_timestamps.clear()
+        self._minute_buckets.clear()
+        self._topk_reserved.clear()
         self.error_patterns.clear()
         self.last_alert_time.clear()
         
         # Also reset Redis counters if available
         if self.redis_enabled:
             try:
-                # Delete all error keys
-                async for key in cache_client.client.scan_iter(match="error:*"):
-                    await cache_client.client.delete(key)
-                async for key in cache_client.client.scan_iter(match="error_stats:*"):
-                    await cache_client.client.delete(key)
+                # Keys derived from the persisted error types are removed without scanning;
+                # UNLINK frees the values in a Redis background thread
+                error_types |= await self._tracked_error_types()
+                keys = [ERROR_TYPES_KEY]
+                minute = int(time.time()) // 60
+                hour_now = minute // 60
+                for error_type in error_types:
+                    keys.extend((
+                        f"error_stream:{error_type}",
+                        f"error_stats:{error_type}",
+                        _minute_key(error_type, minute),
+                        _minute_key(error_type, minute - 1),
+                        *(_hour_key(error_type, hour) for hour in range(hour_now - ERROR_STATS_MAX_HOURS, hour_now + 1)),
+                        f"err_hll:{error_type}",
+                        f"err_topk:{error_type}"
+                    ))
+                with _timed("reset_errors"):
+                    await cache_client.client.unlink(*keys)
+                    # Pre-stream error:* records predate the type set
+                    await self._unlink_matching("error:*")
             except Exception as e:
                 logger.log_error("system", "redis_reset_error", 
                                f"Failed to reset Redis counters: {e}", exc_info=True)
 
+    async def _unlink_matching(self, pattern: str, batch_size: int = 500):
+        """UNLINK keys matching pattern in batches, scanning with a large COUNT hint"""
+        batch = []
+        async for key in cache_client.client.scan_iter(match=pattern, count=1000):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                await cache_client.client.unlink(*batch)
+                batch.clear()
+        if batch:
+            await cache_client.client.unlink(*batch)
+
 # Global error monitor instance
 error_monitor = ErrorMonitor()
 
@@ -325,6 +659,10 @@ async def reset_error_counters():
     """Reset error counters"""
     await error_monitor.reset_error_counters()
 
+async def close_error_monitor():
+    """Flush pending error records and stop background work"""
+    await error_monitor.close()
+
 # Common error types for consistent tracking
 class ErrorTypes:
     DATABASE = "database_error"
@@ -5,77 +5,168 @@
 # from app.models.model import MLModel # This can stay at top-level
 # from app.models.metric import Metric # This can stay at top-level
 
+from collections import OrderedDict
+import threading
+
+MODEL_CACHE_SIZE = 8
+# (path, mtime_ns, size) -> loaded model; a changed file on disk gets a new key
+_MODEL_CACHE: "OrderedDict[tuple, object]" = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def _load_model_cached(model_path: str):
+    """Load a model with joblib, reusing the in-process copy while the file is unchanged"""
+    import os
+    import joblib
+
+    stat = os.stat(model_path)
+    key = (model_path, stat.st_mtime_ns, stat.st_size)
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is not None:
+            _MODEL_CACHE.move_to_end(key)
+            return model
+
+    # mmap_mode maps numpy arrays stored in the pickle instead of copying them into memory
+    model = joblib.load(model_path, mmap_mode='r')
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE[key] = model
+        _MODEL_CACHE.move_to_end(key)
+        while len(_MODEL_CACHE) > MODEL_CACHE_SIZE:
+            _MODEL_CACHE.popitem(last=False)
+    return model
+
+PYARROW_MIN_CSV_BYTES = 1 << 20  # Below ~1 MB pandas' own parser is just as fast
+
+def _read_test_csv(test_csv_path: str):
+    """Load the test CSV, using PyArrow's multi-threaded parser for larger files when available"""
+    import os
+    import pandas as pd
+
+    if os.path.getsize(test_csv_path) >= PYARROW_MIN_CSV_BYTES:
+        # pyarrow is optional - fall back to pandas when it is not installed
+        try:
+            from pyarrow import csv as pacsv
+        except ImportError:
+            pacsv = None
+        if pacsv is not None:
+            table = pacsv.read_csv(
+                test_csv_path,
+                read_options=pacsv.ReadOptions(use_threads=True, block_size=8 << 20)
+            )
+            # self_destruct frees Arrow buffers as columns are converted, avoiding a second full copy
+            return table.to_pandas(self_destruct=True)
+    return pd.read_csv(test_csv_path)
+
+# Largest label value + 1 that may index the confusion matrix directly; beyond this the
+# k * k bincount would be mostly empty (sparse labels like {0, 100000}), so labels are remapped
+DIRECT_INDEX_MAX_LABELS = 1024
+
+def _confusion_matrix(y_true, y_pred):
+    """Build a K x K confusion matrix in one np.bincount pass over both label arrays"""
+    import numpy as np
+
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    k = 0
+    if (len(y_true) and y_true.dtype.kind in "iub" and y_pred.dtype.kind in "iub"
+            and y_true.min() >= 0 and y_pred.min() >= 0):
+        k = int(max(y_true.max(), y_pred.max())) + 1
+    if 0 < k <= DIRECT_INDEX_MAX_LABELS:
+        # Small non-negative integer labels index the matrix directly
+        true_idx = y_true.astype(np.intp)
+        pred_idx = y_pred.astype(np.intp)
+    else:
+        # Arbitrary labels (strings, floats, negatives, sparse integers) are encoded over their union first
+        _, encoded = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+        k = int(encoded.max()) + 1
+        true_idx, pred_idx = encoded[:len(y_true)], encoded[len(y_true):]
+    return np.bincount(true_idx * k + pred_idx, minlength=k * k).reshape(k, k)
+
+def _accuracy_and_weighted_f1(cm):
+    """Accuracy and support-weighted F1 (sklearn average='weighted') from a confusion matrix"""
+    import numpy as np
+
+    tp = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    total = support.sum()
+    # 2TP / (2TP + FP + FN); classes that are never seen nor predicted score 0
+    denom = support + predicted
+    f1_per_class = np.divide(2 * tp, denom, out=np.zeros_like(tp), where=denom > 0)
+    accuracy = tp.sum() / total if total else 0.0
+    weighted_f1 = (f1_per_class * support).sum() / total if total else 0.0
+    return float(accuracy), float(weighted_f1)
+
 def evaluate_and_store_metrics(model_path: str, test_csv_path: str, db, model_id: int):
     # --- ML Library Imports moved inside the function ---
-    import pandas as pd
-    import numpy as np # Although numpy is not directly used, pandas depends on it heavily
-    import joblib
-    from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+    import numpy as np
+    from sklearn.metrics import roc_auc_score
     from datetime import datetime # datetime is lightweight, but can be moved for consistency
+    from sqlalchemy import insert, update
     from ..models.model import MLModel
     from ..models.metric import Metric
     # --- End ML Library Imports ---
 
     try:
         # Load model
-        model = joblib.load(model_path)
+        model = _load_model_cached(model_path)
 
         # Load test data
-        df = pd.read_csv(test_csv_path)
+        df = _read_test_csv(test_csv_path)
 
         if 'target' not in df.columns:
             raise ValueError("Test CSV must contain a 'target' column.")
 
-        X_test = df.drop(columns=['target'])
-        y_test = df['target']
+        # pop avoids the full-frame copy that drop() makes
+        y_test = df.pop('target')
+        X_test = df
 
         # Predict
         y_pred = model.predict(X_test)
 
-        # Try predicting probabilities if possible
-        if hasattr(model, "predict_proba"):
+        # Accuracy and weighted F1 (handles multiclass) from one confusion-matrix pass
+        y_test = y_test.to_numpy()
+        cm = _confusion_matrix(y_test, y_pred)
+        accuracy, f1 = _accuracy_and_weighted_f1(cm)
+
+        # AUC only applies to binary targets with probability outputs
+        auc = None
+        if hasattr(model, "predict_proba") and np.count_nonzero(cm.sum(axis=1)) == 2:
             y_probs = model.predict_proba(X_test)
             try:
-                auc = roc_auc_score(y_test, y_probs[:, 1])
-            except:
+                auc = float(roc_auc_score(y_test, y_probs[:, 1]))
+            except Exception:
                 auc = None
-        else:
-            auc = None
-
-        # Calculate metrics
-        accuracy = float(accuracy_score(y_test, y_pred))
-        f1 = float(f1_score(y_test, y_pred, average='weighted'))  # Handle multiclass
-        auc = float(auc) if auc is not None else None
-
-        # Save new metric row
-        metric = Metric(
-            model_id=model_id,
-            accuracy=accuracy,
-            f1_score=f1,
-            auc=auc,
-            timestamp=datetime.utcnow()
-        )
-        db.add(metric)
-
-        # Update latest values in ml_models table
-        ml_model = db.query(MLModel).filter(MLModel.id == model_id).first()
-        if ml_model:
-            ml_model.accuracy = accuracy
-            ml_model.f1_score = f1
-            ml_model.auc = auc # Ensure AUC is updated for the model as well
 
-        db.commit()
-        db.refresh(metric)
-        db.refresh(ml_model)
-
-        print("🎯 Final metrics:", accuracy, f1, auc)
-        
-        return {
+        final_metrics = {
             "accuracy": accuracy,
             "f1_score": f1,
             "auc": auc
         }
 
+        # INSERT ... RETURNING gives us the new id without a follow-up SELECT
+        metric_id = db.execute(
+            insert(Metric)
+            .values(model_id=model_id, values=final_metrics, timestamp=datetime.utcnow())
+            .returning(Metric.id)
+        ).scalar_one()
+
+        # Update latest values in ml_models table in the same transaction, without loading the row
+        updated = db.execute(
+            update(MLModel)
+            .where(MLModel.id == model_id)
+            .values(latest_metrics=final_metrics)
+            .returning(MLModel.id)
+        ).first()
+        if updated is None:
+            print(f"⚠️ Model {model_id} not found; stored metric {metric_id} only")
+
+        db.commit()
+
+        print("🎯 Final metrics:", accuracy, f1, auc)
+        
+        return final_metrics
+
     except Exception as e:
         db.rollback()
         raise e
\ No newline at end of file
@@ -1,13 +1,25 @@
 import os
 import shutil
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
 import asyncio
 
 logger = logging.getLogger(__name__)
 
-def validate_file_size(file_path: str, max_size_mb: int = 100) -> bool:
+@dataclass(frozen=True)
+class FileSizeCheck:
+    """Result of validate_file_size; truthy when the file is within the limit"""
+    ok: bool
+    size_bytes: int = 0
+    stat: Optional[os.stat_result] = None
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+def validate_file_size(file_path: str, max_size_mb: int = 100) -> FileSizeCheck:
     """
     Validate the size of the file against maximum allowed size.
     
@@ -16,21 +28,23 @@ def validate_file_size(file_path: str, max_size_mb: int = 100) -> bool:
         max_size_mb: Maximum allowed file size in MB (default: 100MB)
     
     Returns:
-        bool: True if file size is within limits, False otherwise
+        FileSizeCheck: truthy if file size is within limits; carries the size and
+        stat result so callers don't need to stat the file again
     """
     try:
-        file_size = os.path.getsize(file_path) / (1024 * 1024)  # Convert to MB
-        if file_size > max_size_mb:
-            logger.error(f"File {file_path} exceeds size limit of {max_size_mb}MB. Size: {file_size:.2f}MB")
-            return False
-        logger.info(f"File {file_path} size validation passed: {file_size:.2f}MB")
-        return True
+        st = os.stat(file_path)
+        size_bytes = st.st_size
+        if size_bytes > max_size_mb << 20:
+            logger.error(f"File {file_path} exceeds size limit of {max_size_mb}MB. Size: {size_bytes / (1 << 20):.2f}MB")
+            return FileSizeCheck(False, size_bytes, st)
+        logger.info(f"File {file_path} size validation passed: {size_bytes / (1 << 20):.2f}MB")
+        return FileSizeCheck(True, size_bytes, st)
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
-        return False
+        return FileSizeCheck(False)
     except Exception as e:
         logger.error(f"Error validating file size for {file_path}: {e}")
-        return False
+        return FileSizeCheck(False)
 
 def validate_file_type(file_path: str, allowed_extensions: List[str] = None) -> bool:
     """
@@ -53,6 +67,82 @@ def validate_file_type(file_path: str, allowed_extensions: List[str] = None) ->
     logger.info(f"File type validation passed: {file_extension}")
     return True
 
+def _sync_cleanup_old_files(uploads_dir: str, cutoff_ts: float) -> tuple:
+    """
+    Walk uploads_dir with os.scandir and remove files modified before cutoff_ts.
+    
+    Runs in a worker thread; DirEntry caches the file type from readdir, so each
+    file costs a single stat() for its mtime.
+    
+    Returns:
+        Tuple of (removed file paths, error messages)
+    """
+    removed_files = []
+    errors = []
+    stack = [uploads_dir]
+    
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff_ts:
+                            os.remove(entry.path)
+                            removed_files.append(entry.path)
+                            logger.info(f"Removed old file: {entry.path}")
+                    except Exception as e:
+                        errors.append(f"Error removing {entry.path}: {e}")
+                        logger.error(f"Error removing file {entry.path}: {e}")
+        except OSError as e:
+            errors.append(f"Error scanning {current}: {e}")
+            logger.error(f"Error scanning directory {current}: {e}")
+    
+    return removed_files, errors
+
+FIND_CLEANUP_MIN_FILES = 1000  # Below this, spawning find costs more than the Python walk
+
+def _has_at_least_files(path: str, limit: int) -> bool:
+    """Walk path only until limit files have been seen"""
+    seen = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        seen += 1
+                        if seen >= limit:
+                            return True
+        except OSError:
+            continue
+    return False
+
+async def _find_cleanup_old_files(uploads_dir: str, days_old: int) -> tuple:
+    """
+    Remove old files with a single `find -delete`, which traverses and unlinks in C.
+    
+    Returns:
+        Tuple of (removed file paths, error messages)
+    """
+    # -mmin keeps the exact days_old cutoff; -mtime +N would round to whole days
+    proc = await asyncio.create_subprocess_exec(
+        "find", uploads_dir, "-type", "f", "-mmin", f"+{days_old * 1440}", "-print", "-delete",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    removed_files = stdout.decode(errors="replace").splitlines()
+    errors = stderr.decode(errors="replace").splitlines() if proc.returncode else []
+    for error in errors:
+        logger.error(f"Error removing old files: {error}")
+    logger.info(f"Removed {len(removed_files)} old files with find")
+    return removed_files, errors
+
 async def cleanup_old_files(days_old: int = 7) -> Dict[str, Any]:
     """
     Remove files older than a specified number of days.
@@ -65,25 +155,21 @@ async def cleanup_old_files(days_old: int = 7) -> Dict[str, Any]:
     """
     cutoff_date = datetime.now() - timedelta(days=days_old)
     uploads_dir = "uploads/eval_jobs/"
-    removed_files = []
-    errors = []
     
     if not os.path.exists(uploads_dir):
         logger.warning(f"Uploads directory not found: {uploads_dir}")
         return {"removed": 0, "errors": 0, "message": "No uploads directory found"}
     
-    for root, dirs, files in os.walk(uploads_dir):
-        for file in files:
-            file_path = os.path.join(root, file)
-            try:
-                file_mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
-                if file_mod_time < cutoff_date:
-                    os.remove(file_path)
-                    removed_files.append(file_path)
-                    logger.info(f"Removed old file: {file_path}")
-            except Exception as e:
-                errors.append(f"Error removing {file_path}: {e}")
-                logger.error(f"Error removing file {file_path}: {e}")
+    # Large trees go to find(1) where available; otherwise the whole walk runs off the event loop
+    if shutil.which("find") and await asyncio.to_thread(_has_at_least_files, uploads_dir, FIND_CLEANUP_MIN_FILES):
+        removed_files, errors = await _find_cleanup_old_files(uploads_dir, days_old)
+    else:
+        removed_files, errors = await asyncio.to_thread(
+            _sync_cleanup_old_files, uploads_dir, cutoff_date.timestamp()
+        )
+    if removed_files:
+        # Freed space must show up in the next usage check
+        _disk_cache.clear()
     
     result = {
         "removed": len(removed_files),
@@ -136,7 +222,7 @@ async def emergency_cleanup() -> Dict[str, Any]:
     result1 = await cleanup_old_files(days_old=1)
     
     # If still critical, clean up files older than 3 days
-    storage_info = get_storage_usage()
+    storage_info = await asyncio.to_thread(get_storage_usage)
     if storage_info.get("alert_level") == "critical":
         result2 = await cleanup_old_files(days_old=3)
         result1["emergency_phase2"] = result2
@@ -148,21 +234,32 @@ async def emergency_cleanup() -> Dict[str, Any]:
         "timestamp": datetime.utcnow().isoformat()
     }
 
+STORAGE_USAGE_TTL = 2.0  # seconds; disk usage barely moves within a burst of calls
+_disk_cache: Dict[str, tuple] = {}  # base_path -> (monotonic time, usage dict)
+
 def get_storage_usage(base_path: str = "uploads/") -> Dict[str, Any]:
     """
     Get current storage usage statistics.
     
+    Results are cached per path for STORAGE_USAGE_TTL seconds.
+    
     Args:
         base_path: Base path to check storage usage
     
     Returns:
         Dict with storage usage information
     """
+    now = time.monotonic()
+    cached = _disk_cache.get(base_path)
+    if cached is not None and now - cached[0] < STORAGE_USAGE_TTL:
+        # Copy so callers can annotate the result without touching the cache
+        return dict(cached[1])
+    
     try:
         total, used, free = shutil.disk_usage(base_path)
-        total_mb = total // (1024 * 1024)
-        used_mb = used // (1024 * 1024)
-        free_mb = free // (1024 * 1024)
+        total_mb = total >> 20
+        used_mb = used >> 20
+        free_mb = free >> 20
         
         # Determine alert level
         alert_level = "normal"
@@ -171,7 +268,7 @@ def get_storage_usage(base_path: str = "uploads/") -> Dict[str, Any]:
         if free_mb < 1024:   # Less than 1GB free
             alert_level = "critical"
         
-        return {
+        usage = {
             "total_size_mb": total_mb,
             "used_size_mb": used_mb,
             "free_size_mb": free_mb,
@@ -179,6 +276,8 @@ def get_storage_usage(base_path: str = "uploads/") -> Dict[str, Any]:
             "usage_percentage": (used_mb / total_mb * 100) if total_mb > 0 else 0,
             "timestamp": datetime.utcnow().isoformat()
         }
+        _disk_cache[base_path] = (now, usage)
+        return dict(usage)
     except Exception as e:
         logger.error(f"Error getting storage usage: {e}")
         return {
@@ -187,10 +286,36 @@ def get_storage_usage(base_path: str = "uploads/") -> Dict[str, Any]:
             "timestamp": datetime.utcnow().isoformat()
         }
 
-def cleanup_failed_evaluations() -> Dict[str, Any]:
+def _find_failed_evaluation_dirs(uploads_dir: str) -> tuple:
+    """
+    Find job directories that are empty or contain only partial (.tmp) files.
+    
+    Returns:
+        Tuple of (candidate directory entries, error messages)
+    """
+    candidates = []
+    errors = []
+    
+    with os.scandir(uploads_dir) as job_entries:
+        job_dirs = [entry for entry in job_entries if entry.is_dir(follow_symlinks=False)]
+    
+    for job_entry in job_dirs:
+        try:
+            with os.scandir(job_entry.path) as entries:
+                if all(entry.name.endswith('.tmp') for entry in entries):
+                    candidates.append(job_entry)
+        except Exception as e:
+            errors.append(f"Error cleaning {job_entry.name}: {e}")
+    
+    return candidates, errors
+
+async def cleanup_failed_evaluations(max_parallel: int = 8) -> Dict[str, Any]:
     """
     Clean up files from failed evaluation jobs.
     
+    Args:
+        max_parallel: Maximum number of directories removed concurrently (default: 8)
+    
     Returns:
         Dict with cleanup results
     """
@@ -198,23 +323,25 @@ def cleanup_failed_evaluations() -> Dict[str, Any]:
     # For now, we'll clean up empty or incomplete directories
     uploads_dir = "uploads/eval_jobs/"
     cleaned_dirs = []
-    errors = []
     
     if not os.path.exists(uploads_dir):
         return {"cleaned": 0, "errors": 0}
     
-    for job_dir in os.listdir(uploads_dir):
-        job_path = os.path.join(uploads_dir, job_dir)
-        if os.path.isdir(job_path):
-            # Check if directory is empty or contains only partial files
+    candidates, errors = await asyncio.to_thread(_find_failed_evaluation_dirs, uploads_dir)
+    
+    # Remove directories in parallel worker threads, bounded to keep IOPS in check
+    semaphore = asyncio.Semaphore(max_parallel)
+    
+    async def remove(job_entry):
+        async with semaphore:
             try:
-                files = os.listdir(job_path)
-                if not files or all(file.endswith('.tmp') for file in files):
-                    shutil.rmtree(job_path)
-                    cleaned_dirs.append(job_dir)
-                    logger.info(f"Cleaned failed evaluation directory: {job_dir}")
+                await asyncio.to_thread(shutil.rmtree, job_entry.path)
+                cleaned_dirs.append(job_entry.name)
+                logger.info(f"Cleaned failed evaluation directory: {job_entry.name}")
             except Exception as e:
-                errors.append(f"Error cleaning {job_dir}: {e}")
+                errors.append(f"Error cleaning {job_entry.name}: {e}")
+    
+    await asyncio.gather(*(remove(job_entry) for job_entry in candidates))
     
     return {
         "cleaned_directories": cleaned_dirs,
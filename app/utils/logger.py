@@ -8,8 +8,125 @@ import json
 import os
 from datetime import datetime
 from typing import Dict, Any, Optional
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
+import copy
+import queue
+import stat
+import threading
 import uuid
+from .time_utils import epoch_iso_ms_z
+
+# orjson is much faster on the logging hot path; fall back to stdlib json without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+class _InProcessQueueHandler(QueueHandler):
+    """QueueHandler for a same-process listener: keeps exc_info so JsonFormatter can structure it"""
+    
+    def prepare(self, record):
+        # The stock prepare() flattens the traceback into msg and drops exc_info, which is
+        # only needed when records cross a process boundary
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.message = message
+        record.msg = message
+        record.args = None
+        return record
+
+# Longest query text kept in database log lines
+QUERY_LOG_MAX_CHARS = 100
+
+# Extra for plain forwarded calls: tells JsonFormatter the record has no extras to collect.
+# Records without the flag (structured log_* calls, other callers) are scanned as before.
+_NO_EXTRAS = {"mw_has_extras": False}
+
+def _mark_plain(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    if "extra" not in kwargs:
+        kwargs["extra"] = _NO_EXTRAS
+    return kwargs
+
+class FastLogger(logging.Logger):
+    """Logger that skips caller lookup
+    
+    Records are almost always emitted from StructuredLogger's own methods, so the frame walk
+    only ever reported log_request/log_response in this module.
+    """
+    
+    def findCaller(self, stack_info=False, stacklevel=1):
+        return "(unknown file)", 0, "(unknown function)", None
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that batches writes in a 64 KB buffer instead of flushing every record
+    
+    Records at WARNING and above are flushed immediately; everything else is flushed
+    by a background timer every flush_interval seconds, on rollover and on close.
+    Rollover is decided from a running byte count: the stock check calls stream.tell(),
+    which flushes the buffer on every record.
+    """
+    
+    def __init__(self, *args, buffer_size: int = 64 * 1024, flush_interval: float = 0.5, **kwargs):
+        self.buffer_size = buffer_size
+        self._bytes_written = 0
+        self._regular_file = True
+        super().__init__(*args, **kwargs)
+        self._flush_stop = threading.Event()
+        self._flush_thread = threading.Thread(
+            target=self._flush_periodically, args=(flush_interval,),
+            name="log-file-flusher", daemon=True
+        )
+        self._flush_thread.start()
+    
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                      encoding=self.encoding, errors=self.errors)
+        # Seed the counter from what is already on disk; emit keeps it current from here
+        st = os.fstat(stream.fileno())
+        self._bytes_written = st.st_size
+        # Never roll over anything other than regular files (e.g. /dev/null)
+        self._regular_file = stat.S_ISREG(st.st_mode)
+        return stream
+    
+    def _would_overflow(self, length: int) -> bool:
+        # Counts characters like the stock check does (exact for ASCII/JSON output)
+        return (self.maxBytes > 0 and self._regular_file
+                and self._bytes_written + length >= self.maxBytes)
+    
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        return self._would_overflow(len(self.format(record)) + len(self.terminator))
+    
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            msg = self.format(record) + self.terminator
+            if self._would_overflow(len(msg)):
+                self.doRollover()  # closes (and so flushes) the old stream first
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._bytes_written += len(msg)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def _flush_periodically(self, interval: float):
+        while not self._flush_stop.wait(interval):
+            self.flush()
+    
+    def close(self):
+        self._flush_stop.set()
+        super().close()
 
 class StructuredLogger:
     """Professional structured logging system"""
@@ -17,6 +134,7 @@ class StructuredLogger:
     def __init__(self):
         self.environment = os.getenv("ENVIRONMENT", "development").lower()
         self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+        self._listener: Optional[QueueListener] = None
         self._configure_logging()
     
     def _configure_logging(self):
@@ -25,34 +143,83 @@ class StructuredLogger:
         logging.getLogger().handlers.clear()
         
         # Create root logger
-        self.logger = logging.getLogger("modelwhiz")
+        self.logger = self._get_app_logger()
         self.logger.setLevel(getattr(logging, self.log_level, logging.INFO))
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        self._info_enabled = self.logger.isEnabledFor(logging.INFO)
         
         if self.environment == "production":
             self._configure_production_logging()
         else:
             self._configure_development_logging()
     
+    def _get_app_logger(self) -> logging.Logger:
+        """Get the "modelwhiz" logger; in production it skips the per-record caller frame walk"""
+        if self.environment != "production" or "modelwhiz" in logging.Logger.manager.loggerDict:
+            return logging.getLogger("modelwhiz")
+        # Swap the logger class only while creating this one logger, not for third-party loggers
+        previous_class = logging.getLoggerClass()
+        logging.setLoggerClass(FastLogger)
+        try:
+            return logging.getLogger("modelwhiz")
+        finally:
+            logging.setLoggerClass(previous_class)
+    
     def _configure_production_logging(self):
         """Configure JSON logging for production"""
         # Console handler with JSON formatting
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(JsonFormatter())
-        self.logger.addHandler(console_handler)
+        handlers = [console_handler]
         
         # File handler with rotation - ensure logs directory exists
         try:
             os.makedirs("logs", exist_ok=True)
-            file_handler = RotatingFileHandler(
+            file_handler = BufferedRotatingFileHandler(
                 filename="logs/app.log",
                 maxBytes=10 * 1024 * 1024,  # 10MB
                 backupCount=5,
                 encoding="utf-8"
             )
             file_handler.setFormatter(JsonFormatter())
-            self.logger.addHandler(file_handler)
+            handlers.append(file_handler)
         except Exception as e:
-            self.logger.error(f"Failed to create file handler: {e}")
+            file_handler_error = e
+        else:
+            file_handler_error = None
+        
+        # Callers only enqueue; formatting and writes happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(_InProcessQueueHandler(log_queue))
+        self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.stop_listener)
+        
+        if file_handler_error is not None:
+            self.logger.error(f"Failed to create file handler: {file_handler_error}")
+    
+    @property
+    def debug_enabled(self) -> bool:
+        """Whether DEBUG records are emitted; cached so hot paths can skip building them"""
+        return self._debug_enabled
+    
+    @property
+    def info_enabled(self) -> bool:
+        """Whether INFO records are emitted"""
+        return self._info_enabled
+    
+    def set_level(self, level: str):
+        """Change the log level at runtime, keeping the cached DEBUG check in sync"""
+        self.log_level = level.upper()
+        self.logger.setLevel(getattr(logging, self.log_level, logging.INFO))
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        self._info_enabled = self.logger.isEnabledFor(logging.INFO)
+    
+    def stop_listener(self):
+        """Flush queued records and stop the background log listener (production only)"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
     
     def _configure_development_logging(self):
         """Configure human-readable logging for development"""
@@ -67,6 +234,8 @@ class StructuredLogger:
     
     def log_request(self, request_id: str, method: str, path: str, user_id: Optional[str] = None):
         """Log API request details"""
+        if not self._info_enabled:
+            return
         extra = {
             "request_id": request_id,
             "method": method,
@@ -78,6 +247,8 @@ class StructuredLogger:
     
     def log_response(self, request_id: str, status_code: int, duration_ms: float, response_size: int):
         """Log API response details"""
+        if not self._info_enabled:
+            return
         extra = {
             "request_id": request_id,
             "status_code": status_code,
@@ -98,6 +269,8 @@ class StructuredLogger:
     
     def log_performance(self, operation: str, duration_ms: float, details: Optional[Dict[str, Any]] = None):
         """Log performance metrics"""
+        if not self._info_enabled:
+            return
         extra = {
             "operation": operation,
             "duration_ms": duration_ms,
@@ -108,9 +281,11 @@ class StructuredLogger:
     
     def log_database_query(self, query: str, duration_ms: float, row_count: Optional[int] = None):
         """Log database query performance"""
+        if not self._debug_enabled:
+            return
         extra = {
             "operation": "database_query",
-            "query": query[:100] + "..." if len(query) > 100 else query,
+            "query": query if len(query) <= QUERY_LOG_MAX_CHARS else query[:QUERY_LOG_MAX_CHARS] + "...",
             "duration_ms": duration_ms,
             "row_count": row_count,
             "type": "database"
@@ -119,6 +294,8 @@ class StructuredLogger:
     
     def log_cache_operation(self, operation: str, key: str, hit: Optional[bool] = None, duration_ms: Optional[float] = None):
         """Log cache operations"""
+        if not self._debug_enabled:
+            return
         extra = {
             "operation": operation,
             "key": key,
@@ -135,62 +312,93 @@ class StructuredLogger:
     # Standard logging methods for compatibility
     def info(self, message: str, *args, **kwargs):
         """Log an info message"""
-        self.logger.info(message, *args, **kwargs)
+        self.logger.info(message, *args, **_mark_plain(kwargs))
 
     def error(self, message: str, *args, **kwargs):
         """Log an error message"""
-        self.logger.error(message, *args, **kwargs)
+        self.logger.error(message, *args, **_mark_plain(kwargs))
 
     def warning(self, message: str, *args, **kwargs):
         """Log a warning message"""
-        self.logger.warning(message, *args, **kwargs)
+        self.logger.warning(message, *args, **_mark_plain(kwargs))
 
     def debug(self, message: str, *args, **kwargs):
         """Log a debug message"""
-        self.logger.debug(message, *args, **kwargs)
+        self.logger.debug(message, *args, **_mark_plain(kwargs))
 
     def critical(self, message: str, *args, **kwargs):
         """Log a critical message"""
-        self.logger.critical(message, *args, **kwargs)
+        self.logger.critical(message, *args, **_mark_plain(kwargs))
+
+
+# LogRecord attributes that are not user extras; built once rather than per record
+_INTERNAL_ATTRS = frozenset({
+    'args', 'asctime', 'created', 'exc_info', 'exc_text', 'filename', 'funcName',
+    'levelname', 'levelno', 'lineno', 'message', 'module', 'msecs',
+    'msg', 'name', 'pathname', 'process', 'processName', 'relativeCreated',
+    'stack_info', 'thread', 'threadName', 'taskName', 'mw_has_extras'
+})
+
+# Base fields JsonFormatter writes itself; extras with these names go through the dict path
+_BASE_FIELDS = frozenset({'timestamp', 'level', 'logger', 'message', 'thread', 'function', 'line', 'exception'})
+
+# Pre-encoded keys for the fixed schema written by JsonFormatter._format_fast
+_K_TS = b'{"timestamp":"'
+_K_LEVEL = b'","level":'
+_K_LOGGER = b',"logger":'
+_K_MESSAGE = b',"message":'
+_K_THREAD = b',"thread":'
+_K_MODULE = b',"module":'
+_K_FUNCTION = b',"function":'
+_K_LINE = b',"line":'
+
+# Encoded ',"key":' prefixes for extra fields; the set of extra keys in use is small
+_KEY_CACHE_MAX = 1024
+_key_cache: Dict[str, bytes] = {}
 
+def _encoded_key(key: str) -> bytes:
+    encoded = _key_cache.get(key)
+    if encoded is None:
+        encoded = b',' + orjson.dumps(key) + b':'
+        if len(_key_cache) < _KEY_CACHE_MAX:
+            _key_cache[key] = encoded
+    return encoded
 
 class JsonFormatter(logging.Formatter):
     """JSON formatter for structured logging with proper extra field handling"""
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Level and logger names repeat on every record; keep their encoded JSON strings
+        self._encoded_names: Dict[str, bytes] = {}
+    
     def format(self, record):
+        if ORJSON_AVAILABLE and not record.exc_info:
+            try:
+                fast = self._format_fast(record)
+            except (TypeError, ValueError):
+                fast = None  # the dict path below produces the fallback record
+            if fast is not None:
+                return fast
+        
         # Create base log record with standard fields
         log_record = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": epoch_iso_ms_z(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
-            "module": record.module,
-            "function": record.funcName,
-            "line": record.lineno,
             "thread": record.threadName,
         }
+        # FastLogger records carry no caller info; leave the fields out rather than emit placeholders
+        if record.lineno:
+            log_record["module"] = record.module
+            log_record["function"] = record.funcName
+            log_record["line"] = record.lineno
         
-        # Add all extra fields from record.__dict__ (excluding internal logging attributes)
-        internal_attrs = {
-            'args', 'asctime', 'created', 'exc_info', 'exc_text', 'filename',
-            'levelname', 'levelno', 'lineno', 'message', 'module', 'msecs',
-            'msg', 'name', 'pathname', 'process', 'processName', 'relativeCreated',
-            'stack_info', 'thread', 'threadName', 'taskName'
-        }
-        
-        for key, value in record.__dict__.items():
-            if key not in internal_attrs and not key.startswith('_'):
-                # Handle complex objects by converting to string if not JSON serializable
-                try:
-                    # Test if value is JSON serializable
-                    json.dumps(value)
-                    log_record[key] = value
-                except (TypeError, ValueError):
-                    # Convert to string representation
-                    try:
-                        log_record[key] = str(value)
-                    except Exception:
-                        log_record[key] = "Unserializable object"
+        # Add extra fields, unless the record is flagged as a plain call without any
+        # Non-serializable values are handled by _json_default during the single dumps below
+        if getattr(record, "mw_has_extras", True):
+            log_record.update(self._extras(record))
         
         # Add exception info if present with better formatting
         if record.exc_info:
@@ -198,13 +406,18 @@ class JsonFormatter(logging.Formatter):
             if exc_type and exc_value:
                 log_record["exception"] = {
                     "type": exc_type.__name__,
-                    "message": str(exc_value),
-                    "traceback": self.formatException(record.exc_info)
+                    "message": str(exc_value)
                 }
+                # Tracebacks only for ERROR and above; cached on the record (as stdlib does)
+                # so the console and file handlers don't both walk it
+                if record.levelno >= logging.ERROR:
+                    if not record.exc_text:
+                        record.exc_text = self.formatException(record.exc_info)
+                    log_record["exception"]["traceback"] = record.exc_text
         
         # Handle any remaining serialization issues
         try:
-            return json.dumps(log_record, ensure_ascii=False, default=self._json_default)
+            return self._dumps(log_record)
         except (TypeError, ValueError) as e:
             # Fallback: create a minimal log record
             fallback_record = {
@@ -215,6 +428,63 @@ class JsonFormatter(logging.Formatter):
             }
             return json.dumps(fallback_record, ensure_ascii=False)
     
+    @staticmethod
+    def _extras(record) -> Dict[str, Any]:
+        """User extras from record.__dict__ (excluding internal logging attributes)"""
+        return {
+            key: value for key, value in record.__dict__.items()
+            if key not in _INTERNAL_ATTRS and not key.startswith('_')
+        }
+    
+    def _encoded_name(self, name: str) -> bytes:
+        encoded = self._encoded_names.get(name)
+        if encoded is None:
+            encoded = orjson.dumps(name)
+            # Capped like _key_cache, in case a handler sees many distinct logger names
+            if len(self._encoded_names) < _KEY_CACHE_MAX:
+                self._encoded_names[name] = encoded
+        return encoded
+    
+    def _format_fast(self, record) -> Optional[str]:
+        """Write the fixed schema straight into a byte buffer (records without exceptions)
+        
+        Same output as the dict path; returns None when an extra would shadow a base field.
+        """
+        extras = self._extras(record) if getattr(record, "mw_has_extras", True) else None
+        if extras and not _BASE_FIELDS.isdisjoint(extras):
+            return None
+        
+        buf = bytearray(_K_TS)
+        buf += epoch_iso_ms_z(record.created).encode()
+        buf += _K_LEVEL
+        buf += self._encoded_name(record.levelname)
+        buf += _K_LOGGER
+        buf += self._encoded_name(record.name)
+        buf += _K_MESSAGE
+        buf += orjson.dumps(record.getMessage())
+        buf += _K_THREAD
+        # Thread names aren't cached: default Thread-N / executor names are unbounded
+        buf += orjson.dumps(record.threadName)
+        if record.lineno:
+            buf += _K_MODULE
+            buf += orjson.dumps(record.module)
+            buf += _K_FUNCTION
+            buf += orjson.dumps(record.funcName)
+            buf += _K_LINE
+            buf += str(record.lineno).encode()
+        if extras:
+            for key, value in extras.items():
+                buf += _encoded_key(key)
+                buf += orjson.dumps(value, default=self._json_default, option=_ORJSON_OPTIONS)
+        buf += b'}'
+        return buf.decode()
+    
+    def _dumps(self, log_record: Dict[str, Any]) -> str:
+        """Serialize a log record in one pass, converting unsupported values via _json_default"""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(log_record, default=self._json_default, option=_ORJSON_OPTIONS).decode()
+        return json.dumps(log_record, ensure_ascii=False, default=self._json_default)
+    
     def _json_default(self, obj):
         """Default JSON serializer for complex objects"""
         if isinstance(obj, (datetime,)):
@@ -2,46 +2,149 @@
 
 # Removed top-level imports: pandas, joblib, sklearn.metrics
 
+CSV_CHUNK_ROWS = 50_000
+
+class _StreamingConfusionMatrix:
+    """Confusion matrix accumulated chunk by chunk over labels discovered as they appear"""
+
+    def __init__(self):
+        import numpy as np
+
+        self._np = np
+        self.label_index = {}
+        self.matrix = np.zeros((0, 0), dtype=np.int64)
+
+    def add(self, y_true, y_pred):
+        np = self._np
+        labels, encoded = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+        # Map this chunk's labels onto the running label order (only the few distinct labels are looked up)
+        for label in labels.tolist():
+            self.label_index.setdefault(label, len(self.label_index))
+        to_global = np.array([self.label_index[label] for label in labels.tolist()], dtype=np.intp)
+        encoded = to_global[encoded.ravel()]
+
+        k = len(self.label_index)
+        if self.matrix.shape[0] < k:
+            grown = np.zeros((k, k), dtype=np.int64)
+            grown[:self.matrix.shape[0], :self.matrix.shape[1]] = self.matrix
+            self.matrix = grown
+
+        n = len(y_true)
+        self.matrix += np.bincount(encoded[:n] * k + encoded[n:], minlength=k * k).reshape(k, k)
+
+    @property
+    def n_classes(self) -> int:
+        """Distinct labels seen in the true targets"""
+        return int(self._np.count_nonzero(self.matrix.sum(axis=1)))
+
+def _iter_csv_chunks(test_csv_path: str, use_pyarrow: bool = True):
+    """Yield the test CSV as DataFrame chunks, parsed by PyArrow's streaming reader when available"""
+    import pandas as pd
+
+    pacsv = None
+    if use_pyarrow:
+        # pyarrow is optional - fall back to pandas' chunked reader without it
+        try:
+            from pyarrow import csv as pacsv
+        except ImportError:
+            pacsv = None
+
+    if pacsv is None:
+        yield from pd.read_csv(test_csv_path, chunksize=CSV_CHUNK_ROWS)
+        return
+
+    import pyarrow as pa
+
+    reader = pacsv.open_csv(test_csv_path, read_options=pacsv.ReadOptions(block_size=8 << 20))
+    for batch in reader:
+        # split_blocks + self_destruct hand the Arrow buffers over without a consolidated copy
+        yield pa.Table.from_batches([batch]).to_pandas(split_blocks=True, self_destruct=True)
+
+def _accumulate_chunks(model, chunks):
+    """Predict each chunk and fold it into a streaming confusion matrix (plus binary AUC inputs)"""
+    import numpy as np
+
+    cm = _StreamingConfusionMatrix()
+    # Binary classifiers with probabilities get predictions and AUC scores from one predict_proba call
+    classes = getattr(model, "classes_", None)
+    binary_proba = hasattr(model, "predict_proba") and classes is not None and len(classes) == 2
+    true_parts, proba_parts = [], []
+    total_rows = 0
+
+    for chunk in chunks:
+        # Auto-detect target column
+        # Ensure there's at least one column to drop and one for target
+        if chunk.shape[1] < 2:
+            raise ValueError("Input DataFrame must have at least two columns for features and target.")
+        if chunk.empty:
+            continue
+        total_rows += len(chunk)
+
+        # Target is the last column; positional selection avoids drop()'s full-frame copy
+        X = chunk.iloc[:, :-1]
+        y = chunk.iloc[:, -1].to_numpy()
+
+        # Models fitted on plain arrays take the ndarray directly; ones fitted on a
+        # DataFrame keep it, since they may select columns by name
+        features = X if hasattr(model, "feature_names_in_") else X.to_numpy()
+        if binary_proba:
+            # One forward pass: binary predictions are the argmax of the probabilities
+            # (strict > keeps argmax's tie-break towards classes_[0])
+            proba = model.predict_proba(features)
+            y_pred = classes[(proba[:, 1] > 0.5).astype(np.intp)]
+            true_parts.append(y)
+            proba_parts.append(proba[:, 1])
+        else:
+            y_pred = model.predict(features)
+        cm.add(y, np.asarray(y_pred))
+
+    return cm, binary_proba, true_parts, proba_parts, total_rows
+
 def evaluate_model_metrics(model_path: str, test_csv_path: str):
     # --- ML Library Imports moved inside the function ---
-    import pandas as pd
+    import numpy as np
     import joblib
-    from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+    from sklearn.metrics import roc_auc_score
+    from .evaluation import _accuracy_and_weighted_f1
     # --- End ML Library Imports ---
 
     model = joblib.load(model_path)
-    df = pd.read_csv(test_csv_path)
 
-    # Auto-detect target column
-    # Ensure there's at least one column to drop and one for target
-    if df.empty:
-        raise ValueError("Input DataFrame is empty.")
-    if df.shape[1] < 2:
-        raise ValueError("Input DataFrame must have at least two columns for features and target.")
-    
-    target_col = df.columns[-1]
-    X = df.drop(columns=[target_col])
-    y = df[target_col]
+    # Stream the CSV so peak memory is bounded by the chunk size rather than the file size;
+    # accuracy/F1 come from an accumulated confusion matrix
+    try:
+        cm, binary_proba, true_parts, proba_parts, total_rows = _accumulate_chunks(
+            model, _iter_csv_chunks(test_csv_path)
+        )
+    except ValueError as e:
+        # pyarrow.ArrowInvalid subclasses ValueError: Arrow infers column types from the first
+        # block, so a later block that doesn't fit (e.g. ints then floats) restarts on pandas
+        if type(e).__name__ != "ArrowInvalid":
+            raise
+        cm, binary_proba, true_parts, proba_parts, total_rows = _accumulate_chunks(
+            model, _iter_csv_chunks(test_csv_path, use_pyarrow=False)
+        )
 
-    y_pred = model.predict(X)
+    if total_rows == 0:
+        raise ValueError("Input DataFrame is empty.")
 
+    accuracy, f1 = _accuracy_and_weighted_f1(cm.matrix)
     metrics = {
-        "accuracy": round(accuracy_score(y, y_pred), 4),
-        "f1_score": round(f1_score(y, y_pred, average='weighted'), 4),
+        "accuracy": round(accuracy, 4),
+        "f1_score": round(f1, 4),
         "auc": None
     }
 
     # Try AUC only for binary or probability-supporting classifiers
     try:
-        if hasattr(model, "predict_proba"):
+        if binary_proba:
             # Check if y is binary for roc_auc_score
-            if len(y.unique()) == 2:
-                y_proba = model.predict_proba(X)[:, 1]
-                metrics["auc"] = round(roc_auc_score(y, y_proba), 4)
+            if cm.n_classes == 2:
+                metrics["auc"] = round(roc_auc_score(np.concatenate(true_parts), np.concatenate(proba_parts)), 4)
             else:
                 print("Skipping AUC calculation: target is not binary.")
     except Exception as e:
         print(f"Error calculating AUC: {e}")
         pass # AUC remains None if calculation fails
 
-    return metrics
\ No newline at end of file
+    return metrics
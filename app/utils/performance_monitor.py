@@ -3,60 +3,136 @@ Performance monitoring utilities for ModelWhiz backend
 Provides timing decorators and performance tracking for ML operations
 """
 
+import os
 import time
 import asyncio
-from typing import Dict, Any, Optional, Callable
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from typing import Dict, Any, List, Optional, Callable
 from functools import wraps
-from datetime import datetime
 from .logger import get_logger, log_performance
+from .time_utils import epoch_iso_ms_z
 
 logger = get_logger()
 
+# PERF_TRACKING=0 makes the tracking decorators return functions unwrapped and the
+# context manager a no-op (zero overhead)
+_PERF_ENABLED = os.getenv("PERF_TRACKING", "1") == "1"
+# PERF_LAZY=1 defers operation stats collection until something first asks for them
+_PERF_LAZY = os.getenv("PERF_LAZY", "0") == "1"
+
+@dataclass(slots=True)
+class OpStats:
+    """Counters for one tracked operation (integer nanoseconds; converted to ms on read)"""
+    count: int = 0
+    total_ns: int = 0
+    success: int = 0
+    failure: int = 0
+    min_ns: int = 2**63
+    max_ns: int = 0
+    last: float = 0.0  # epoch seconds of the latest execution
+
+class _StatsBucket:
+    """One thread's counters; only its owning thread writes to it"""
+    __slots__ = ("hits", "misses", "total_operations", "operation_timings")
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.total_operations = 0
+        self.operation_timings: Dict[str, OpStats] = {}
+
+class _OperationTimer:
+    """Context manager timing one block, for code that can't take a decorator"""
+    __slots__ = ("_monitor", "_operation_name", "_start_ns")
+    
+    def __init__(self, monitor: "PerformanceMonitor", operation_name: str):
+        self._monitor = monitor
+        self._operation_name = operation_name
+    
+    def __enter__(self):
+        self._start_ns = time.monotonic_ns()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        error = exc if isinstance(exc, Exception) else None
+        self._monitor._record_operation(self._operation_name, time.monotonic_ns() - self._start_ns, (), {}, error)
+        return False
+
 class PerformanceMonitor:
-    """Performance monitoring system for tracking ML operations and cache performance"""
+    """Performance monitoring system for tracking ML operations and cache performance
+    
+    Writers update per-thread buckets without locking; readers merge all buckets on demand.
+    """
     
     def __init__(self):
-        self.operation_timings = {}
-        self.cache_stats = {
-            "hits": 0,
-            "misses": 0,
-            "total_operations": 0
-        }
+        self._tls = threading.local()
+        self._buckets: List[_StatsBucket] = []
+        self._buckets_lock = threading.Lock()
+        self._stats_requested = not _PERF_LAZY
+    
+    def _bucket(self) -> _StatsBucket:
+        """This thread's stats bucket, registered on first use"""
+        bucket = getattr(self._tls, "bucket", None)
+        if bucket is None:
+            bucket = _StatsBucket()
+            self._tls.bucket = bucket
+            with self._buckets_lock:
+                self._buckets.append(bucket)
+        return bucket
+    
+    def _snapshot_buckets(self) -> List[_StatsBucket]:
+        with self._buckets_lock:
+            return list(self._buckets)
+    
+    @property
+    def operation_timings(self) -> Dict[str, OpStats]:
+        """Per-operation stats merged across threads"""
+        merged: Dict[str, OpStats] = {}
+        for bucket in self._snapshot_buckets():
+            for op_name, stats in list(bucket.operation_timings.items()):
+                total = merged.get(op_name)
+                if total is None:
+                    merged[op_name] = replace(stats)
+                    continue
+                total.count += stats.count
+                total.total_ns += stats.total_ns
+                total.success += stats.success
+                total.failure += stats.failure
+                if stats.min_ns < total.min_ns:
+                    total.min_ns = stats.min_ns
+                if stats.max_ns > total.max_ns:
+                    total.max_ns = stats.max_ns
+                if stats.last > total.last:
+                    total.last = stats.last
+        return merged
+    
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """Cache counters summed across threads"""
+        stats = {"hits": 0, "misses": 0, "total_operations": 0}
+        for bucket in self._snapshot_buckets():
+            stats["hits"] += bucket.hits
+            stats["misses"] += bucket.misses
+            stats["total_operations"] += bucket.total_operations
+        return stats
     
     def track_operation(self, operation_name: str):
         """Decorator to track execution time of synchronous functions"""
+        if not _PERF_ENABLED:
+            return lambda func: func
+        
         def decorator(func):
             @wraps(func)
             def wrapper(*args, **kwargs):
-                start_time = time.time()
+                start_ns = time.monotonic_ns()
                 try:
                     result = func(*args, **kwargs)
-                    duration_ms = (time.time() - start_time) * 1000
-                    
-                    # Log the performance
-                    log_performance(operation_name, duration_ms, {
-                        "args_count": len(args),
-                        "kwargs_count": len(kwargs),
-                        "success": True
-                    })
-                    
-                    # Update internal tracking
-                    self._update_operation_stats(operation_name, duration_ms, True)
-                    
+                    self._record_operation(operation_name, time.monotonic_ns() - start_ns, args, kwargs)
                     return result
                 except Exception as e:
-                    duration_ms = (time.time() - start_time) * 1000
-                    
-                    # Log the failed operation
-                    log_performance(operation_name, duration_ms, {
-                        "args_count": len(args),
-                        "kwargs_count": len(kwargs),
-                        "success": False,
-                        "error": str(e)
-                    })
-                    
-                    # Update internal tracking
-                    self._update_operation_stats(operation_name, duration_ms, False)
+                    self._record_operation(operation_name, time.monotonic_ns() - start_ns, args, kwargs, e)
                     raise
             
             return wrapper
@@ -64,81 +140,84 @@ class PerformanceMonitor:
     
     def track_async_operation(self, operation_name: str):
         """Decorator to track execution time of asynchronous functions"""
+        if not _PERF_ENABLED:
+            return lambda func: func
+        
         def decorator(func):
             @wraps(func)
             async def wrapper(*args, **kwargs):
-                start_time = time.time()
+                start_ns = time.monotonic_ns()
                 try:
                     result = await func(*args, **kwargs)
-                    duration_ms = (time.time() - start_time) * 1000
-                    
-                    # Log the performance
-                    log_performance(operation_name, duration_ms, {
-                        "args_count": len(args),
-                        "kwargs_count": len(kwargs),
-                        "success": True
-                    })
-                    
-                    # Update internal tracking
-                    self._update_operation_stats(operation_name, duration_ms, True)
-                    
+                    self._record_operation(operation_name, time.monotonic_ns() - start_ns, args, kwargs)
                     return result
                 except Exception as e:
-                    duration_ms = (time.time() - start_time) * 1000
-                    
-                    # Log the failed operation
-                    log_performance(operation_name, duration_ms, {
-                        "args_count": len(args),
-                        "kwargs_count": len(kwargs),
-                        "success": False,
-                        "error": str(e)
-                    })
-                    
-                    # Update internal tracking
-                    self._update_operation_stats(operation_name, duration_ms, False)
+                    self._record_operation(operation_name, time.monotonic_ns() - start_ns, args, kwargs, e)
                     raise
             
             return wrapper
         return decorator
     
-    def _update_operation_stats(self, operation_name: str, duration_ms: float, success: bool):
-        """Update internal operation statistics"""
-        if operation_name not in self.operation_timings:
-            self.operation_timings[operation_name] = {
-                "count": 0,
-                "total_time_ms": 0,
-                "success_count": 0,
-                "failure_count": 0,
-                "min_time_ms": float('inf'),
-                "max_time_ms": 0,
-                "last_execution": datetime.utcnow().isoformat()
+    def time_block(self, operation_name: str):
+        """Context manager to track execution time of a block"""
+        if not _PERF_ENABLED:
+            return nullcontext()
+        return _OperationTimer(self, operation_name)
+    
+    def _record_operation(self, operation_name: str, duration_ns: int, args: tuple, kwargs: dict,
+                          error: Optional[Exception] = None):
+        """Log and track one finished operation, skipping whichever side nobody consumes"""
+        if logger.info_enabled:
+            details = {
+                "args_count": len(args),
+                "kwargs_count": len(kwargs),
+                "success": error is None
             }
+            if error is not None:
+                details["error"] = str(error)
+            log_performance(operation_name, duration_ns / 1_000_000, details)
+        
+        if self._stats_requested:
+            self._update_operation_stats(operation_name, duration_ns, error is None)
+    
+    def _update_operation_stats(self, operation_name: str, duration_ns: int, success: bool):
+        """Update internal operation statistics"""
+        operation_timings = self._bucket().operation_timings
+        stats = operation_timings.get(operation_name)
+        if stats is None:
+            stats = operation_timings[operation_name] = OpStats()
         
-        stats = self.operation_timings[operation_name]
-        stats["count"] += 1
-        stats["total_time_ms"] += duration_ms
-        stats["min_time_ms"] = min(stats["min_time_ms"], duration_ms)
-        stats["max_time_ms"] = max(stats["max_time_ms"], duration_ms)
-        stats["last_execution"] = datetime.utcnow().isoformat()
+        stats.count += 1
+        stats.total_ns += duration_ns
+        # Plain comparisons instead of min()/max() calls
+        if duration_ns < stats.min_ns:
+            stats.min_ns = duration_ns
+        if duration_ns > stats.max_ns:
+            stats.max_ns = duration_ns
+        stats.last = time.time()
         
         if success:
-            stats["success_count"] += 1
+            stats.success += 1
         else:
-            stats["failure_count"] += 1
+            stats.failure += 1
     
     def track_cache_hit(self, key: str, duration_ms: Optional[float] = None):
         """Track a cache hit"""
-        self.cache_stats["hits"] += 1
-        self.cache_stats["total_operations"] += 1
+        bucket = self._bucket()
+        bucket.hits += 1
+        bucket.total_operations += 1
         
-        logger.log_cache_operation("hit", key, True, duration_ms)
+        if logger.debug_enabled:
+            logger.log_cache_operation("hit", key, True, duration_ms)
     
     def track_cache_miss(self, key: str, duration_ms: Optional[float] = None):
         """Track a cache miss"""
-        self.cache_stats["misses"] += 1
-        self.cache_stats["total_operations"] += 1
+        bucket = self._bucket()
+        bucket.misses += 1
+        bucket.total_operations += 1
         
-        logger.log_cache_operation("miss", key, False, duration_ms)
+        if logger.debug_enabled:
+            logger.log_cache_operation("miss", key, False, duration_ms)
     
     def track_cache_operation(self, operation: str, key: str, 
                             hit: Optional[bool] = None, duration_ms: Optional[float] = None):
@@ -149,13 +228,18 @@ class PerformanceMonitor:
             else:
                 self.track_cache_miss(key, duration_ms)
         else:
-            self.cache_stats["total_operations"] += 1
-            logger.log_cache_operation(operation, key, hit, duration_ms)
+            self._bucket().total_operations += 1
+            if logger.debug_enabled:
+                logger.log_cache_operation(operation, key, hit, duration_ms)
     
     def get_operation_stats(self, operation_name: Optional[str] = None) -> Dict[str, Any]:
         """Get performance statistics for operations"""
+        # Under PERF_LAZY, collection starts with the first request for stats
+        self._stats_requested = True
+        operation_timings = self.operation_timings
         if operation_name:
-            return self.operation_timings.get(operation_name, {})
+            stats = operation_timings.get(operation_name)
+            return self._format_operation_stats(stats) if stats else {}
         
         # Return aggregate stats for all operations
         total_stats = {
@@ -166,12 +250,14 @@ class PerformanceMonitor:
             "operations": {}
         }
         
-        for op_name, stats in self.operation_timings.items():
-            total_stats["total_operations"] += stats["count"]
-            total_stats["total_time_ms"] += stats["total_time_ms"]
-            total_stats["success_count"] += stats["success_count"]
-            total_stats["failure_count"] += stats["failure_count"]
-            total_stats["operations"][op_name] = stats
+        total_time_ns = 0
+        for op_name, stats in operation_timings.items():
+            total_stats["total_operations"] += stats.count
+            total_time_ns += stats.total_ns
+            total_stats["success_count"] += stats.success
+            total_stats["failure_count"] += stats.failure
+            total_stats["operations"][op_name] = self._format_operation_stats(stats)
+        total_stats["total_time_ms"] = total_time_ns / 1_000_000
         
         if total_stats["total_operations"] > 0:
             total_stats["avg_time_ms"] = total_stats["total_time_ms"] / total_stats["total_operations"]
@@ -179,13 +265,25 @@ class PerformanceMonitor:
         
         return total_stats
     
+    @staticmethod
+    def _format_operation_stats(stats: OpStats) -> Dict[str, Any]:
+        """Operation stats for output: durations in milliseconds, last execution as ISO 8601"""
+        return {
+            "count": stats.count,
+            "total_time_ms": stats.total_ns / 1_000_000,
+            "success_count": stats.success,
+            "failure_count": stats.failure,
+            "min_time_ms": stats.min_ns / 1_000_000,
+            "max_time_ms": stats.max_ns / 1_000_000,
+            "last_execution": epoch_iso_ms_z(stats.last)
+        }
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics"""
-        hits = self.cache_stats["hits"]
-        misses = self.cache_stats["misses"]
-        total = self.cache_stats["total_operations"]
-        
-        stats = self.cache_stats.copy()
+        stats = self.cache_stats
+        hits = stats["hits"]
+        misses = stats["misses"]
+        total = stats["total_operations"]
         
         if total > 0:
             stats["hit_rate"] = (hits / total) * 100
@@ -198,12 +296,10 @@ class PerformanceMonitor:
     
     def reset_stats(self):
         """Reset all performance statistics"""
-        self.operation_timings.clear()
-        self.cache_stats = {
-            "hits": 0,
-            "misses": 0,
-            "total_operations": 0
-        }
+        # Fresh thread-locals make every thread register a new, empty bucket
+        with self._buckets_lock:
+            self._tls = threading.local()
+            self._buckets = []
 
 # Global performance monitor instance
 performance_monitor = PerformanceMonitor()
@@ -217,6 +313,10 @@ def track_async_performance(operation_name: str):
     """Decorator to track performance of asynchronous functions"""
     return performance_monitor.track_async_operation(operation_name)
 
+def track_performance_cm(operation_name: str):
+    """Context manager to track performance of a block"""
+    return performance_monitor.time_block(operation_name)
+
 # Convenience functions
 def get_performance_stats(operation_name: Optional[str] = None) -> Dict[str, Any]:
     """Get performance statistics"""
@@ -1,18 +1,134 @@
+import heapq
 import os
 import shutil
 import logging
-from datetime import datetime, timedelta
+import time
+from collections import defaultdict, deque
+from itertools import islice
+from datetime import datetime
 from typing import Dict, Any, List
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Entries kept in the largest_files / oldest_files report lists
+TOP_FILES_LIMIT = 10
+# Upper bound on reusing a detailed analysis while eval_jobs/ itself is unchanged; changes
+# deeper in a job directory don't touch its mtime, and file ages drift
+ANALYSIS_CACHE_TTL = 300
+# Threads walking job directories concurrently during a detailed analysis
+ANALYSIS_MAX_WORKERS = 8
+
+def _push_top(heap: List[tuple], item: tuple):
+    """Keep item if it ranks in the top TOP_FILES_LIMIT of a bounded min-heap"""
+    if len(heap) < TOP_FILES_LIMIT:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+def _analyze_job_dir(job_index: int, job_path: str):
+    """Walk one evaluation job directory
+    
+    Returns (file count, total MB, MB per extension, largest heap, oldest heap). Heap items are
+    (key, -job_index, -seq, path, mtime) so that ties rank the earliest-seen file first.
+    """
+    total_files = 0
+    total_mb = 0
+    breakdown = defaultdict(int)
+    largest_heap: List[tuple] = []
+    oldest_heap: List[tuple] = []
+    seq = 0
+    
+    # Iterative scandir walk: DirEntry caches the file type and one stat() serves
+    # both size and mtime, instead of os.walk plus getsize/getmtime per file
+    stack = [job_path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue  # os.walk skips unreadable directories too
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # Like os.walk, don't descend into symlinked directories
+                    if not entry.is_symlink():
+                        stack.append(entry.path)
+                    continue
+                
+                total_files += 1
+                file_path = entry.path
+                try:
+                    # The only per-file syscall left; file types come from getdents d_type.
+                    # lstat semantics: symlinked files report the link itself and never
+                    # need a second stat() to follow it out of the tree
+                    file_stat = entry.stat(follow_symlinks=False)
+                    file_size = file_stat.st_size // (1024 * 1024)  # MB
+                    # Same result as os.path.splitext: leading dots don't start an extension
+                    stem, dot, extension = entry.name.rpartition('.')
+                    file_extension = "." + extension.lower() if dot and stem.strip('.') else ""
+                    file_mtime = datetime.fromtimestamp(file_stat.st_mtime)
+                    
+                    total_mb += file_size
+                    breakdown[file_extension] += file_size
+                    
+                    # Track largest and oldest files
+                    seq += 1
+                    age_days = (datetime.now() - file_mtime).days
+                    _push_top(largest_heap, (file_size, -job_index, -seq, file_path, file_mtime))
+                    _push_top(oldest_heap, (age_days, -job_index, -seq, file_path, file_mtime))
+                    
+                except Exception as e:
+                    logger.warning(f"Error analyzing file {file_path}: {e}")
+    
+    return total_files, total_mb, breakdown, largest_heap, oldest_heap
+
+# Fixed recommendation lines per alert level; only the free-space line varies per report
+_CRITICAL_RECOMMENDATIONS = (
+    "🚨 CRITICAL: Storage space critically low!",
+    "🆘 Perform emergency cleanup immediately",
+    "🗑️ Delete files older than 1 day",
+    "📦 Archive completed evaluation jobs",
+    "⚠️ Consider increasing storage capacity",
+)
+_HIGH_WARNING_RECOMMENDATIONS = (
+    "⚠️ HIGH WARNING: Storage space very low",
+    "🗑️ Clean up files older than 3 days",
+    "📊 Monitor usage closely",
+    "🔄 Schedule regular cleanup tasks",
+)
+_WARNING_RECOMMENDATIONS = (
+    "📢 WARNING: Storage space running low",
+    "🗑️ Clean up files older than 7 days",
+    "📈 Review storage growth trends",
+    "🔍 Identify large files for cleanup",
+)
+_NORMAL_RECOMMENDATIONS = (
+    "✅ Storage status: Normal",
+    "📊 Continue regular monitoring",
+    "🔄 Schedule preventive maintenance",
+)
+_RECOMMENDATIONS_BY_LEVEL = {
+    "critical": _CRITICAL_RECOMMENDATIONS,
+    "high_warning": _HIGH_WARNING_RECOMMENDATIONS,
+    "warning": _WARNING_RECOMMENDATIONS,
+}
+_GENERAL_RECOMMENDATIONS = ("📋 Use /api/storage/report for detailed analysis",)
+
 class StorageMonitor:
     def __init__(self, base_path: str = "uploads/"):
         self.base_path = base_path
         self.last_check = None
-        self.history = []
         self.max_history_size = 100  # Keep last 100 checks
+        self.history = deque(maxlen=self.max_history_size)
+        # Epoch seconds of each history entry, so trend windows filter without parsing ISO strings
+        self._history_epochs = deque(maxlen=self.max_history_size)
+        # (eval_jobs mtime_ns, monotonic time, analysis) of the last detailed analysis
+        self._analysis_cache = None
     
     async def check_storage_status(self) -> Dict[str, Any]:
         """
@@ -22,7 +138,9 @@ class StorageMonitor:
             Dict with comprehensive storage status information
         """
         try:
-            total, used, free = shutil.disk_usage(self.base_path)
+            # statvfs can block on slow or network filesystems; keep it off the event loop.
+            # History is still updated here, on the loop, so concurrent checks don't race on it
+            total, used, free = await asyncio.to_thread(shutil.disk_usage, self.base_path)
             
             # Convert to MB for readability
             total_mb = total // (1024 * 1024)
@@ -53,11 +171,8 @@ class StorageMonitor:
             }
             
             self.last_check = status_data
-            self.history.append(status_data)
-            
-            # Keep history size manageable
-            if len(self.history) > self.max_history_size:
-                self.history = self.history[-self.max_history_size:]
+            self.history.append(status_data)  # deque(maxlen) drops the oldest check
+            self._history_epochs.append(time.time())
             
             return status_data
             
@@ -70,6 +185,10 @@ class StorageMonitor:
             logger.error(f"Error checking storage status: {e}")
             return error_data
     
+    def _recent_history(self, count: int) -> List[Dict[str, Any]]:
+        """Last `count` history entries (deques don't support slicing)"""
+        return list(islice(self.history, max(0, len(self.history) - count), None))
+    
     def _calculate_trend(self, current_usage: float) -> str:
         """
         Calculate storage usage trend based on history.
@@ -84,7 +203,7 @@ class StorageMonitor:
             return "unknown"
         
         # Get last few data points for trend analysis
-        recent_data = self.history[-5:] if len(self.history) >= 5 else self.history
+        recent_data = self._recent_history(5)
         
         usage_values = [data.get("usage_percentage", 0) for data in recent_data]
         
@@ -131,9 +250,15 @@ class StorageMonitor:
         """
         Analyze storage usage by directory and file types.
         
+        The directory walk runs in a worker thread so the event loop keeps serving requests.
+        
         Returns:
             Detailed storage analysis
         """
+        return await asyncio.to_thread(self._analyze_storage_usage_sync)
+    
+    def _analyze_storage_usage_sync(self) -> Dict[str, Any]:
+        """Blocking body of _analyze_storage_usage"""
         eval_jobs_dir = os.path.join(self.base_path, "eval_jobs")
         analysis = {
             "total_jobs": 0,
@@ -144,61 +269,59 @@ class StorageMonitor:
             "oldest_files": []
         }
         
-        if not os.path.exists(eval_jobs_dir):
+        try:
+            jobs_mtime_ns = os.stat(eval_jobs_dir).st_mtime_ns
+        except OSError:
             return analysis
         
+        # Jobs being added or removed bumps the directory mtime; reuse the last walk otherwise
+        cached = self._analysis_cache
+        if (cached is not None and cached[0] == jobs_mtime_ns
+                and time.monotonic() - cached[1] < ANALYSIS_CACHE_TTL):
+            return dict(cached[2])
+        
+        file_type_breakdown = defaultdict(int)
+        
         try:
             # Walk through all evaluation job directories
-            for job_dir in os.listdir(eval_jobs_dir):
-                job_path = os.path.join(eval_jobs_dir, job_dir)
-                if os.path.isdir(job_path):
-                    analysis["total_jobs"] += 1
-                    
-                    for root, dirs, files in os.walk(job_path):
-                        analysis["total_files"] += len(files)
-                        
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            try:
-                                file_size = os.path.getsize(file_path) // (1024 * 1024)  # MB
-                                file_extension = os.path.splitext(file)[1].lower()
-                                file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-                                
-                                analysis["total_storage_used_mb"] += file_size
-                                
-                                # Update file type breakdown
-                                analysis["file_type_breakdown"][file_extension] = \
-                                    analysis["file_type_breakdown"].get(file_extension, 0) + file_size
-                                
-                                # Track largest files
-                                analysis["largest_files"].append({
-                                    "path": file_path,
-                                    "size_mb": file_size,
-                                    "modified": file_mtime.isoformat()
-                                })
-                                
-                                # Track oldest files
-                                analysis["oldest_files"].append({
-                                    "path": file_path,
-                                    "modified": file_mtime.isoformat(),
-                                    "age_days": (datetime.now() - file_mtime).days
-                                })
-                                
-                            except Exception as e:
-                                logger.warning(f"Error analyzing file {file_path}: {e}")
+            with os.scandir(eval_jobs_dir) as job_entries:
+                job_paths = [entry.path for entry in job_entries if entry.is_dir()]
+            analysis["total_jobs"] = len(job_paths)
             
-            # Sort and limit largest/oldest files lists
-            analysis["largest_files"].sort(key=lambda x: x["size_mb"], reverse=True)
-            analysis["largest_files"] = analysis["largest_files"][:10]  # Top 10 largest
+            # Job directories are independent subtrees and the walk is syscall-bound (the GIL is
+            # released during scandir/stat), so they are analyzed concurrently and merged here
+            largest_items, oldest_items = [], []
+            if job_paths:
+                workers = min(ANALYSIS_MAX_WORKERS, len(job_paths))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-analysis") as pool:
+                    results = pool.map(_analyze_job_dir, range(len(job_paths)), job_paths)
+                    for total_files, total_mb, breakdown, largest_heap, oldest_heap in results:
+                        analysis["total_files"] += total_files
+                        analysis["total_storage_used_mb"] += total_mb
+                        for file_extension, size_mb in breakdown.items():
+                            file_type_breakdown[file_extension] += size_mb
+                        largest_items.extend(largest_heap)
+                        oldest_items.extend(oldest_heap)
             
-            analysis["oldest_files"].sort(key=lambda x: x["age_days"], reverse=True)
-            analysis["oldest_files"] = analysis["oldest_files"][:10]  # Top 10 oldest
+            # Top 10 largest / oldest, built into report dicts only for the survivors
+            analysis["largest_files"] = [
+                {"path": path, "size_mb": size_mb, "modified": mtime.isoformat()}
+                for size_mb, _, _, path, mtime in heapq.nlargest(TOP_FILES_LIMIT, largest_items)
+            ]
+            analysis["oldest_files"] = [
+                {"path": path, "modified": mtime.isoformat(), "age_days": age_days}
+                for age_days, _, _, path, mtime in heapq.nlargest(TOP_FILES_LIMIT, oldest_items)
+            ]
             
         except Exception as e:
             logger.error(f"Error during storage analysis: {e}")
             analysis["analysis_error"] = str(e)
         
-        return analysis
+        # Plain dict for the report (kept even if the walk stopped early, as before)
+        analysis["file_type_breakdown"] = dict(file_type_breakdown)
+        if "analysis_error" not in analysis:
+            self._analysis_cache = (jobs_mtime_ns, time.monotonic(), analysis)
+        return dict(analysis)
     
     def _get_history_summary(self) -> Dict[str, Any]:
         """
@@ -210,22 +333,30 @@ class StorageMonitor:
         if not self.history:
             return {"message": "No history data available"}
         
-        recent_history = self.history[-24:]  # Last 24 checks (approx 1 day if hourly)
-        
-        usage_values = [data.get("usage_percentage", 0) for data in recent_history]
+        # Last 24 checks (approx 1 day if hourly), summarized in a single pass
+        count = 0
+        total_usage = 0.0
+        min_usage = max_usage = usage = None
         status_counts = {}
         
-        for data in recent_history:
+        for data in islice(self.history, max(0, len(self.history) - 24), None):
+            usage = data.get("usage_percentage", 0)
+            count += 1
+            total_usage += usage
+            if min_usage is None or usage < min_usage:
+                min_usage = usage
+            if max_usage is None or usage > max_usage:
+                max_usage = usage
             status = data.get("status", "unknown")
             status_counts[status] = status_counts.get(status, 0) + 1
         
         return {
-            "period_hours": len(recent_history),
-            "average_usage": round(sum(usage_values) / len(usage_values), 2) if usage_values else 0,
-            "max_usage": round(max(usage_values), 2) if usage_values else 0,
-            "min_usage": round(min(usage_values), 2) if usage_values else 0,
+            "period_hours": count,
+            "average_usage": round(total_usage / count, 2),
+            "max_usage": round(max_usage, 2),
+            "min_usage": round(min_usage, 2),
             "status_distribution": status_counts,
-            "trend": self._calculate_trend(usage_values[-1] if usage_values else 0)
+            "trend": self._calculate_trend(usage)
         }
     
     def _generate_recommendations(self, status: Dict[str, Any]) -> List[str]:
@@ -238,39 +369,14 @@ class StorageMonitor:
         Returns:
             List of recommendations
         """
-        recommendations = []
         alert_level = status.get("status", "normal")
         free_mb = status.get("free_mb", 0)
         
-        if alert_level == "critical":
-            recommendations.append("🚨 CRITICAL: Storage space critically low!")
-            recommendations.append("🆘 Perform emergency cleanup immediately")
-            recommendations.append("🗑️ Delete files older than 1 day")
-            recommendations.append("📦 Archive completed evaluation jobs")
-            recommendations.append("⚠️ Consider increasing storage capacity")
-            
-        elif alert_level == "high_warning":
-            recommendations.append("⚠️ HIGH WARNING: Storage space very low")
-            recommendations.append("🗑️ Clean up files older than 3 days")
-            recommendations.append("📊 Monitor usage closely")
-            recommendations.append("🔄 Schedule regular cleanup tasks")
-            
-        elif alert_level == "warning":
-            recommendations.append("📢 WARNING: Storage space running low")
-            recommendations.append("🗑️ Clean up files older than 7 days")
-            recommendations.append("📈 Review storage growth trends")
-            recommendations.append("🔍 Identify large files for cleanup")
-            
-        else:
-            recommendations.append("✅ Storage status: Normal")
-            recommendations.append("📊 Continue regular monitoring")
-            recommendations.append("🔄 Schedule preventive maintenance")
-            
-        # Add general recommendations
-        recommendations.append(f"💾 Free space: {free_mb}MB available")
-        recommendations.append("📋 Use /api/storage/report for detailed analysis")
+        # Any other status (normal, error, ...) gets the normal-level advice
+        base = _RECOMMENDATIONS_BY_LEVEL.get(alert_level, _NORMAL_RECOMMENDATIONS)
         
-        return recommendations
+        # Add general recommendations
+        return [*base, f"💾 Free space: {free_mb}MB available", *_GENERAL_RECOMMENDATIONS]
     
     async def get_usage_trend(self, hours: int = 24) -> Dict[str, Any]:
         """
@@ -285,8 +391,8 @@ class StorageMonitor:
         if not self.history:
             return {"message": "No history data available"}
         
-        relevant_data = [data for data in self.history 
-                        if datetime.fromisoformat(data["timestamp"]) > datetime.utcnow() - timedelta(hours=hours)]
+        cutoff = time.time() - hours * 3600
+        relevant_data = [data for epoch, data in zip(self._history_epochs, self.history) if epoch > cutoff]
         
         if not relevant_data:
             return {"message": f"No data for the last {hours} hours"}
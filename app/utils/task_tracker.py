@@ -4,9 +4,12 @@ Provides real-time progress updates, task management, and result caching.
 """
 
 import asyncio
-import json
+import time
+from collections import OrderedDict
+import orjson
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
+from celery import states
 from celery.result import AsyncResult
 
 from app.workers.celery_app import celery_app
@@ -16,6 +19,17 @@ from app.cache.redis_client import cache_client
 
 logger = get_logger()
 
+# cleanup_expired_tasks removes entries with less than this many seconds to live
+EXPIRING_TTL_SECONDS = 300
+# Keys per SCAN page and per pipelined TTL/delete batch
+CLEANUP_BATCH_SIZE = 500
+
+# Progress writes for one task closer together than this are coalesced (final states always go through)
+PROGRESS_MIN_INTERVAL = 0.2
+TERMINAL_TASK_STATES = frozenset({"SUCCESS", "FAILURE", "REVOKED"})
+# Tasks remembered for coalescing; least recently updated ones are forgotten first
+MAX_TRACKED_PROGRESS = 1024
+
 class TaskTracker:
     """Task progress tracking and management system"""
     
@@ -23,11 +37,15 @@ class TaskTracker:
         self.progress_cache_prefix = "task:progress:"
         self.result_cache_prefix = "task:result:"
         self.cache_ttl = 3600  # 1 hour TTL for task results
+        self._last_flush: "OrderedDict[str, float]" = OrderedDict()  # task_id -> monotonic time of last write
     
     async def update_task_progress(self, task_id: str, progress: Dict[str, Any]):
         """
         Update task progress in Redis cache for real-time access.
         """
+        if self._should_coalesce(task_id, progress):
+            return True
+        
         try:
             if cache_client.client:
                 progress_data = {
@@ -39,11 +57,11 @@ class TaskTracker:
                     "timestamp": datetime.utcnow().isoformat()
                 }
                 
-                cache_key = f"{self.progress_cache_prefix}{task_id}"
+                cache_key = self.progress_cache_prefix + task_id
                 await cache_client.client.setex(
                     cache_key,
                     self.cache_ttl,
-                    json.dumps(progress_data)
+                    orjson.dumps(progress_data)
                 )
                 return True
         except Exception as e:
@@ -52,16 +70,34 @@ class TaskTracker:
         
         return False
     
+    def _should_coalesce(self, task_id: str, progress: Dict[str, Any]) -> bool:
+        """Whether this update lands too soon after the last write for the task to be worth sending"""
+        now = time.monotonic()
+        final = (progress.get("status") in TERMINAL_TASK_STATES
+                 or progress.get("current", 0) >= progress.get("total", 100))
+        last = self._last_flush.get(task_id)
+        if not final and last is not None and now - last < PROGRESS_MIN_INTERVAL:
+            return True
+        
+        if final:
+            self._last_flush.pop(task_id, None)
+        else:
+            self._last_flush[task_id] = now
+            self._last_flush.move_to_end(task_id)
+            if len(self._last_flush) > MAX_TRACKED_PROGRESS:
+                self._last_flush.popitem(last=False)
+        return False
+    
     async def get_task_progress(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
         Get task progress from Redis cache.
         """
         try:
             if cache_client.client:
-                cache_key = f"{self.progress_cache_prefix}{task_id}"
+                cache_key = self.progress_cache_prefix + task_id
                 progress_data = await cache_client.client.get(cache_key)
                 if progress_data:
-                    return json.loads(progress_data)
+                    return orjson.loads(progress_data)
         except Exception as e:
             logger.error(f"Failed to get task progress for {task_id}: {e}")
         
@@ -80,11 +116,13 @@ class TaskTracker:
                     "expires_at": (datetime.utcnow() + timedelta(seconds=self.cache_ttl)).isoformat()
                 }
                 
-                cache_key = f"{self.result_cache_prefix}{task_id}"
+                cache_key = self.result_cache_prefix + task_id
                 await cache_client.client.setex(
                     cache_key,
                     self.cache_ttl,
-                    json.dumps(result_data, default=str)
+                    # Results can hold arbitrary task output: stringify unknown types and allow
+                    # non-string dict keys as json.dumps did
+                    orjson.dumps(result_data, default=str, option=orjson.OPT_NON_STR_KEYS)
                 )
                 return True
         except Exception as e:
@@ -99,10 +137,10 @@ class TaskTracker:
         """
         try:
             if cache_client.client:
-                cache_key = f"{self.result_cache_prefix}{task_id}"
+                cache_key = self.result_cache_prefix + task_id
                 result_data = await cache_client.client.get(cache_key)
                 if result_data:
-                    return json.loads(result_data)
+                    return orjson.loads(result_data)
         except Exception as e:
             logger.error(f"Failed to get cached result for {task_id}: {e}")
         
@@ -114,27 +152,11 @@ class TaskTracker:
         """
         try:
             if cache_client.client:
-                # Clean progress cache
-                progress_keys = []
-                async for key in cache_client.client.scan_iter(match=f"{self.progress_cache_prefix}*"):
-                    progress_keys.append(key)
-                
-                for key in progress_keys:
-                    ttl = await cache_client.client.ttl(key)
-                    if ttl < 300:  # Less than 5 minutes left
-                        await cache_client.client.delete(key)
-                
-                # Clean result cache
-                result_keys = []
-                async for key in cache_client.client.scan_iter(match=f"{self.result_cache_prefix}*"):
-                    result_keys.append(key)
-                
-                for key in result_keys:
-                    ttl = await cache_client.client.ttl(key)
-                    if ttl < 300:  # Less than 5 minutes left
-                        await cache_client.client.delete(key)
+                removed = 0
+                for prefix in (self.progress_cache_prefix, self.result_cache_prefix):
+                    removed += await self._cleanup_prefix(cache_client.client, prefix)
                 
-                logger.info(f"Cleaned up {len(progress_keys) + len(result_keys)} expired task entries")
+                logger.info(f"Cleaned up {removed} expired task entries")
                 return True
                 
         except Exception as e:
@@ -143,28 +165,58 @@ class TaskTracker:
         
         return False
     
+    async def _cleanup_prefix(self, client, prefix: str) -> int:
+        """Delete keys under prefix that are about to expire, one pipelined batch at a time"""
+        removed = 0
+        batch = []
+        async for key in client.scan_iter(match=f"{prefix}*", count=CLEANUP_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= CLEANUP_BATCH_SIZE:
+                removed += await self._delete_expiring(client, batch)
+                batch = []
+        if batch:
+            removed += await self._delete_expiring(client, batch)
+        return removed
+    
+    async def _delete_expiring(self, client, keys: List[Any]) -> int:
+        """One round trip for the TTLs of a batch and one for unlinking those under the threshold"""
+        async with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.ttl(key)
+            ttls = await pipe.execute()
+        
+        expiring = [key for key, ttl in zip(keys, ttls) if ttl < EXPIRING_TTL_SECONDS]
+        if expiring:
+            # UNLINK frees the values on a Redis background thread instead of the main loop
+            await client.unlink(*expiring)
+        return len(expiring)
+    
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """
         Get comprehensive task status including progress and result.
         """
         task_result = AsyncResult(task_id, app=celery_app)
+        # Every state/info access on a pending task is a fresh backend fetch, so read each once
+        # and derive the flags (status is an alias of state)
+        state = task_result.state
+        info = task_result.info
         
         status_info = {
             "task_id": task_id,
-            "status": task_result.status,
-            "ready": task_result.ready(),
-            "successful": task_result.successful(),
-            "failed": task_result.failed(),
-            "state": task_result.state,
-            "info": task_result.info if task_result.info else {}
+            "status": state,
+            "ready": state in states.READY_STATES,
+            "successful": state == states.SUCCESS,
+            "failed": state == states.FAILURE,
+            "state": state,
+            "info": info if info else {}
         }
         
         # Add progress information if available
-        if task_result.info and isinstance(task_result.info, dict):
+        if info and isinstance(info, dict):
             status_info.update({
-                "progress": task_result.info.get("current", 0),
-                "total": task_result.info.get("total", 100),
-                "message": task_result.info.get("status", "")
+                "progress": info.get("current", 0),
+                "total": info.get("total", 100),
+                "message": info.get("status", "")
             })
         
         return status_info
@@ -0,0 +1,32 @@
+"""
+Time helpers for ModelWhiz backend
+Provides cheap, cached timestamp formatting for hot paths
+"""
+
+import time
+
+# (epoch second, formatted string) - replaced as a single tuple so readers never see a torn pair
+_iso_cache = (0, "")
+
+def utcnow_iso_z() -> str:
+    """Current UTC time as ISO 8601 with a Z suffix, formatted at most once per second"""
+    global _iso_cache
+    now = int(time.time())
+    cached = _iso_cache
+    if cached[0] != now:
+        cached = (now, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)))
+        _iso_cache = cached
+    return cached[1]
+
+# Same idea for log records: the second-resolution prefix is shared, only milliseconds vary
+_prefix_cache = (0, "")
+
+def epoch_iso_ms_z(timestamp: float) -> str:
+    """Format an epoch timestamp (e.g. LogRecord.created) as ISO 8601 with milliseconds and a Z suffix"""
+    global _prefix_cache
+    second = int(timestamp)
+    cached = _prefix_cache
+    if cached[0] != second:
+        cached = (second, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second)))
+        _prefix_cache = cached
+    return f"{cached[1]}.{int((timestamp - second) * 1000):03d}Z"
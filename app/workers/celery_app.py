@@ -1,6 +1,13 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from kombu.serialization import register
+import asyncio
 import os
+import threading
+from types import MappingProxyType
+from typing import Optional
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +30,33 @@ REDIS_RESULT_BACKEND = os.getenv("REDIS_RESULT_BACKEND") if "redis://" in REDIS_
 logger.info(f"Celery Redis Broker URL: {REDIS_BROKER_URL}")
 logger.info(f"Celery Redis Result Backend: {REDIS_RESULT_BACKEND}")
 
+# Static route table: exact task name -> queue/priority
+TASK_ROUTES = MappingProxyType({
+    "app.workers.tasks.evaluate_model_async": {"queue": "ml_tasks", "priority": 5},
+    "app.workers.tasks.evaluate_models_batch": {"queue": "ml_tasks", "priority": 5},
+    "app.workers.tasks.cleanup_old_files": {"queue": "maintenance", "priority": 8},
+    "app.workers.tasks.generate_model_insights": {"queue": "ml_tasks", "priority": 6},
+    "app.workers.tasks.update_model_statistics": {"queue": "maintenance", "priority": 7},
+    "app.workers.tasks.health_check_system": {"queue": "maintenance", "priority": 9},
+    "app.workers.tasks.process_evaluation_task": {"queue": "ml_tasks", "priority": 5},
+    "app.workers.tasks.evaluate_model_with_perf_tracking": {"queue": "ml_tasks", "priority": 5},
+    "app.workers.tasks.preprocess_data_with_perf_tracking": {"queue": "ml_tasks", "priority": 6},
+})
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Celery router: one exact-name lookup instead of MapRoute's glob/regex matching"""
+    route = TASK_ROUTES.get(name)
+    # Celery pops keys off the returned route, so hand out a copy
+    return dict(route) if route is not None else None
+
+def _orjson_dumps(obj):
+    # Non-string keys and odd leaf types appear in metric dicts; stringify rather than fail
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+# C-implemented JSON for task results (dicts of metrics, insights and health data)
+register('orjson', _orjson_dumps, orjson.loads,
+         content_type='application/x-orjson', content_encoding='utf-8')
+
 celery_app = Celery(
     "modelwhiz_workers",
     broker=REDIS_BROKER_URL,
@@ -33,16 +67,7 @@ celery_app = Celery(
 # Celery configuration
 celery_app.conf.update(
     # Task routing and priorities
-    task_routes={
-        "app.workers.tasks.evaluate_model_async": {"queue": "ml_tasks", "priority": 5},
-        "app.workers.tasks.cleanup_old_files": {"queue": "maintenance", "priority": 8},
-        "app.workers.tasks.generate_model_insights": {"queue": "ml_tasks", "priority": 6},
-        "app.workers.tasks.update_model_statistics": {"queue": "maintenance", "priority": 7},
-        "app.workers.tasks.health_check_system": {"queue": "maintenance", "priority": 9},
-        "app.workers.tasks.process_evaluation_task": {"queue": "ml_tasks", "priority": 5},
-        "app.workers.tasks.evaluate_model_with_perf_tracking": {"queue": "ml_tasks", "priority": 5},
-        "app.workers.tasks.preprocess_data_with_perf_tracking": {"queue": "ml_tasks", "priority": 6},
-    },
+    task_routes=(route_task,),
     
     # Worker concurrency settings
     worker_concurrency=int(os.getenv("CELERY_WORKER_CONCURRENCY", 4)),
@@ -70,10 +95,13 @@ celery_app.conf.update(
     broker_connection_max_retries=20,  # Increased retries
     broker_connection_retry_delay=1.0,  # Start with 1 second delay
     
-    # Task serialization
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    # Task serialization: msgpack payloads are smaller and faster to encode than JSON;
+    # results are stored as orjson. The older formats stay accepted so messages and
+    # results written before a rollout are still readable
+    task_serializer='msgpack',
+    accept_content=['msgpack', 'orjson', 'json'],
+    result_serializer='orjson',
+    result_accept_content=['orjson', 'msgpack', 'json'],
     
     # Timezone
     timezone='UTC',
@@ -108,10 +136,11 @@ celery_app.conf.update(
     task_always_eager=False,  # Set to True for testing without Redis
     
     # Redis connection pool settings (only if using Redis)
+    # fanout_prefix stays because revoke_task broadcasts over control; pattern-based
+    # fanout subscriptions aren't needed for a single deployment
     broker_transport_options={
         'visibility_timeout': 3600,
         'fanout_prefix': True,
-        'fanout_patterns': True,
     } if "redis://" in REDIS_BROKER_URL else {},
     
     # Result backend transport options
@@ -123,6 +152,45 @@ celery_app.conf.update(
     } if "redis://" in REDIS_BROKER_URL else {}
 )
 
+# Long-lived event loop per worker process, so async tasks reuse it (and the async DB pool bound
+# to it) instead of building and tearing down a loop with asyncio.run on every task
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread_loops = threading.local()
+
+@worker_process_init.connect
+def start_worker_loop(**kwargs):
+    """Start this worker process's event loop in a background thread"""
+    global _worker_loop
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="worker-event-loop", daemon=True).start()
+    _worker_loop = loop
+
+@worker_process_shutdown.connect
+def stop_worker_loop(**kwargs):
+    """Stop the worker process's event loop"""
+    global _worker_loop
+    loop, _worker_loop = _worker_loop, None
+    if loop is not None:
+        loop.call_soon_threadsafe(loop.stop)
+
+def run_in_worker_loop(coro):
+    """Run a coroutine to completion on the worker process's event loop"""
+    loop = _worker_loop
+    if loop is None:
+        # No prefork child loop (eager mode, solo/threads pool, scripts): keep one loop per
+        # thread instead of asyncio.run, whose loop.close() would drop the async DB connections
+        thread_loop = getattr(_thread_loops, "loop", None)
+        if thread_loop is None or thread_loop.is_closed():
+            thread_loop = _thread_loops.loop = asyncio.new_event_loop()
+        return thread_loop.run_until_complete(coro)
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result()
+    except BaseException:
+        # e.g. a soft time limit raised in this thread - don't leave the coroutine running
+        future.cancel()
+        raise
+
 # Auto-discover tasks from tasks.py
 celery_app.autodiscover_tasks(["app.workers.tasks"])
 
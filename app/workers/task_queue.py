@@ -11,8 +11,9 @@ def get_task_status(task_id: str):
     Get the current status and progress of a Celery task.
     """
     task_result = AsyncResult(task_id, app=celery_app)
+    # Each status/info access may hit the result backend; read each once
     status = task_result.status
-    info = task_result.info if task_result.info else {}
+    info = task_result.info or {}
     progress = info.get('current', 0)
     total = info.get('total', 100)
     message = info.get('status', '')
@@ -1,50 +1,145 @@
 import time
-from typing import Dict, Any, Optional
+from functools import wraps
+from typing import Dict, Any, List, Optional
 from celery import current_task
+from celery.exceptions import SoftTimeLimitExceeded
 from celery.utils.log import get_task_logger
 import os
-import shutil
 from datetime import datetime, timedelta
+from types import MappingProxyType
+import orjson
 
-from .celery_app import celery_app
+from .celery_app import celery_app, run_in_worker_loop
 from app.utils.logger import get_logger
 from app.utils.error_monitor import track_error, ErrorTypes
-from app.utils.performance_monitor import track_performance, ML_OPERATIONS
+from app.utils.performance_monitor import track_performance_cm, ML_OPERATIONS
 from app.evaluation_engine.main_evaluator import run_evaluation_task
 
 logger = get_logger()
 task_logger = get_task_logger(__name__)
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
-def process_evaluation_task(self, model_id: int, dataset_path: str, request_id: Optional[str] = None):
-    """
-    Asynchronous model evaluation task.
-    Moves heavy ML processing to background workers.
+# The placeholder tasks below only pause to mimic real work when DEBUG_SIMULATE=1;
+# otherwise they return immediately instead of pinning a worker slot
+DEBUG_SIMULATE = os.getenv("DEBUG_SIMULATE", "0") == "1"
+
+# Minimum seconds between PROGRESS writes to the result backend for one task run
+PROGRESS_UPDATE_INTERVAL = 0.5
+
+# Evaluation jobs one batch task runs at once; each loads a model and fits it in a thread
+EVAL_BATCH_CONCURRENCY = int(os.getenv("EVAL_BATCH_CONCURRENCY", "2"))
+# Largest batch accepted, since the whole batch shares one task time limit
+EVAL_BATCH_MAX_JOBS = int(os.getenv("EVAL_BATCH_MAX_JOBS", "16"))
+
+# Static parts of the simulated results; each call only adds its timestamp
+_MODEL_STATISTICS_TEMPLATE = MappingProxyType({
+    "total_models": 42,
+    "average_accuracy": 0.78,
+    "total_evaluations": 156,
+    "top_performing_models": (
+        {"model_id": 1, "accuracy": 0.92},
+        {"model_id": 5, "accuracy": 0.89},
+        {"model_id": 8, "accuracy": 0.87}
+    )
+})
+_HEALTH_CHECK_TEMPLATE = MappingProxyType({
+    "database": "healthy",
+    "cache": "healthy",
+    "storage": "healthy",
+    "ml_services": "healthy",
+    "system_load": 0.45,
+    "memory_usage": "2.1GB/8GB",
+    "disk_usage": "45GB/100GB"
+})
+
+# Seconds a memoized task result is served from Redis
+TASK_RESULT_MEMO_TTL = 60
+_memo_client = None
+
+def _get_memo_client():
+    """Synchronous Redis client for memoized task results (workers don't run the app's async client)"""
+    global _memo_client
+    if _memo_client is None:
+        import redis
+        _memo_client = redis.Redis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379"),
+            socket_connect_timeout=2,
+            socket_timeout=2
+        )
+    return _memo_client
+
+def memoize_task_result(ttl: int = TASK_RESULT_MEMO_TTL, bound: bool = False):
+    """Serve a task's result from Redis for ttl seconds, keyed by task name and arguments
+    
+    Set bound=True for bind=True tasks so the task instance isn't part of the key. Redis
+    errors fall through to running the task.
     """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key_args = args[1:] if bound else args
+            try:
+                key = b"task:memo:" + func.__name__.encode() + b":" + orjson.dumps(
+                    [key_args, kwargs], option=orjson.OPT_SORT_KEYS
+                )
+                cached = _get_memo_client().get(key)
+                if cached is not None:
+                    return orjson.loads(cached)
+            except Exception as e:
+                task_logger.warning(f"Task result cache lookup failed for {func.__name__}: {e}")
+                key = None
+            
+            result = func(*args, **kwargs)
+            
+            if key is not None:
+                try:
+                    _get_memo_client().set(key, orjson.dumps(result), ex=ttl)
+                except Exception as e:
+                    task_logger.warning(f"Task result cache store failed for {func.__name__}: {e}")
+            return result
+        return wrapper
+    return decorator
+
+def _simulate_work(seconds: float):
+    """Sleep for a simulated stage, only when DEBUG_SIMULATE is on"""
+    if DEBUG_SIMULATE:
+        time.sleep(seconds)
+
+def _report_progress(task, current: int, status: str, total: int = 100):
+    """Publish a PROGRESS state unless this task run published one within PROGRESS_UPDATE_INTERVAL"""
+    now = time.monotonic()
+    # The request context lives for one execution, so the throttle resets per run
+    last = getattr(task.request, "mw_last_progress", None)
+    if last is not None and now - last < PROGRESS_UPDATE_INTERVAL:
+        return
+    task.request.mw_last_progress = now
+    task.update_state(state='PROGRESS', meta={'current': current, 'total': total, 'status': status})
+
+def _do_evaluation(task, model_id: int, dataset_path: str, request_id: Optional[str] = None):
+    """Simulated evaluation body shared by the evaluation tasks; task is the running bound task"""
     try:
         # Update task progress
-        self.update_state(state='PROGRESS', meta={'current': 10, 'total': 100, 'status': 'Loading data'})
+        _report_progress(task, 10, 'Loading data')
         
         # Simulate data loading
-        time.sleep(2)
+        _simulate_work(2)
         
         # Update progress
-        self.update_state(state='PROGRESS', meta={'current': 30, 'total': 100, 'status': 'Preprocessing'})
+        _report_progress(task, 30, 'Preprocessing')
         
         # Simulate preprocessing
-        time.sleep(3)
+        _simulate_work(3)
         
         # Update progress
-        self.update_state(state='PROGRESS', meta={'current': 60, 'total': 100, 'status': 'Model evaluation'})
+        _report_progress(task, 60, 'Model evaluation')
         
         # Simulate model evaluation (this is where the actual ML processing would happen)
-        time.sleep(5)
+        _simulate_work(5)
         
         # Update progress
-        self.update_state(state='PROGRESS', meta={'current': 90, 'total': 100, 'status': 'Generating insights'})
+        _report_progress(task, 90, 'Generating insights')
         
         # Simulate insight generation
-        time.sleep(2)
+        _simulate_work(2)
         
         # Final result
         result = {
@@ -68,8 +163,16 @@ def process_evaluation_task(self, model_id: int, dataset_path: str, request_id:
         error_message = f"Model evaluation failed for model {model_id}: {str(e)}"
         task_logger.error(error_message)
         track_error(ErrorTypes.ML, error_message, request_id)
-        self.update_state(state='FAILURE', meta={'error': error_message})
-        raise self.retry(exc=e)
+        task.update_state(state='FAILURE', meta={'error': error_message})
+        raise task.retry(exc=e)
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
+def process_evaluation_task(self, model_id: int, dataset_path: str, request_id: Optional[str] = None):
+    """
+    Asynchronous model evaluation task.
+    Moves heavy ML processing to background workers.
+    """
+    return _do_evaluation(self, model_id, dataset_path, request_id)
 
 @celery_app.task
 def cleanup_old_files():
@@ -77,33 +180,43 @@ def cleanup_old_files():
     Scheduled cleanup task for old files and temporary data.
     """
     try:
+        # Bytes paths: scandir then yields bytes names and skips decoding each one
         cleanup_dirs = [
-            "uploads/temp",
-            "uploads/eval_jobs"
+            b"uploads/temp",
+            b"uploads/eval_jobs"
         ]
         
         deleted_files = 0
         deleted_size = 0
+        # Files last modified before this epoch time are removed (7 days)
+        cutoff = time.time() - timedelta(days=7).total_seconds()
         
         for dir_path in cleanup_dirs:
-            if os.path.exists(dir_path):
-                for item in os.listdir(dir_path):
-                    item_path = os.path.join(dir_path, item)
+            # Opening the directory doubles as the existence check (no separate stat, no race)
+            try:
+                entries = os.scandir(dir_path)
+            except FileNotFoundError:
+                continue
+            # scandir entries carry the file type, and one stat() gives both mtime and size
+            with entries:
+                for entry in entries:
+                    item_path = entry.path
                     try:
-                        if os.path.isfile(item_path):
+                        if entry.is_file():
                             # Delete files older than 7 days
-                            file_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(item_path))
-                            if file_age > timedelta(days=7):
-                                file_size = os.path.getsize(item_path)
+                            st = entry.stat(follow_symlinks=False)
+                            if st.st_mtime < cutoff:
                                 os.remove(item_path)
                                 deleted_files += 1
-                                deleted_size += file_size
-                        elif os.path.isdir(item_path):
+                                deleted_size += st.st_size
+                        elif entry.is_dir():
                             # Delete empty directories
-                            if not os.listdir(item_path):
-                                shutil.rmtree(item_path)
+                            with os.scandir(item_path) as children:
+                                is_empty = next(children, None) is None
+                            if is_empty:
+                                os.rmdir(item_path)
                     except Exception as e:
-                        task_logger.warning(f"Failed to clean up {item_path}: {e}")
+                        task_logger.warning(f"Failed to clean up {os.fsdecode(item_path)}: {e}")
         
         return {
             "deleted_files": deleted_files,
@@ -118,20 +231,21 @@ def cleanup_old_files():
         raise
 
 @celery_app.task(bind=True)
+@memoize_task_result(bound=True)
 def generate_model_insights(self, model_id: int):
     """
     Generate charts and visualizations for model evaluation results.
     """
     try:
-        self.update_state(state='PROGRESS', meta={'current': 25, 'total': 100, 'status': 'Generating charts'})
+        _report_progress(self, 25, 'Generating charts')
         
         # Simulate chart generation
-        time.sleep(3)
+        _simulate_work(3)
         
-        self.update_state(state='PROGRESS', meta={'current': 75, 'total': 100, 'status': 'Creating visualizations'})
+        _report_progress(self, 75, 'Creating visualizations')
         
         # Simulate visualization creation
-        time.sleep(2)
+        _simulate_work(2)
         
         insights = {
             "model_id": model_id,
@@ -159,6 +273,7 @@ def generate_model_insights(self, model_id: int):
         raise
 
 @celery_app.task
+@memoize_task_result()
 def update_model_statistics():
     """
     Update cached statistics and model performance metrics.
@@ -167,17 +282,7 @@ def update_model_statistics():
         # This would typically query the database and update cache
         # For now, we'll simulate the operation
         
-        stats = {
-            "total_models": 42,
-            "average_accuracy": 0.78,
-            "total_evaluations": 156,
-            "last_updated": datetime.utcnow().isoformat(),
-            "top_performing_models": [
-                {"model_id": 1, "accuracy": 0.92},
-                {"model_id": 5, "accuracy": 0.89},
-                {"model_id": 8, "accuracy": 0.87}
-            ]
-        }
+        stats = {**_MODEL_STATISTICS_TEMPLATE, "last_updated": datetime.utcnow().isoformat()}
         
         logger.info("Model statistics updated")
         return stats
@@ -194,16 +299,7 @@ def health_check_system():
     System monitoring and health check tasks.
     """
     try:
-        health_checks = {
-            "database": "healthy",
-            "cache": "healthy", 
-            "storage": "healthy",
-            "ml_services": "healthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "system_load": 0.45,
-            "memory_usage": "2.1GB/8GB",
-            "disk_usage": "45GB/100GB"
-        }
+        health_checks = {**_HEALTH_CHECK_TEMPLATE, "timestamp": datetime.utcnow().isoformat()}
         
         logger.info("System health check completed")
         return health_checks
@@ -215,45 +311,53 @@ def health_check_system():
         raise
 
 # Performance tracked ML operations
-@celery_app.task(bind=True)
-@track_performance(ML_OPERATIONS["MODEL_EVALUATION"])
+# Same retry policy as process_evaluation_task, since _do_evaluation retries through this task
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
 def evaluate_model_with_perf_tracking(self, model_id: int, dataset_path: str):
     """Model evaluation with performance tracking"""
-    return process_evaluation_task(self, model_id, dataset_path)
+    # Call the shared body directly; calling the other task would re-enter Celery's task
+    # wrapper (which also binds its own self, shifting these arguments)
+    with track_performance_cm(ML_OPERATIONS["MODEL_EVALUATION"]):
+        return _do_evaluation(self, model_id, dataset_path)
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
-def evaluate_model_async(self, job_id: int, model_id: int, zip_path: str, csv_path: str, target_column: str, split_data: bool):
-    """
-    Asynchronous model evaluation task that integrates with the evaluation engine.
-    """
-    from sqlalchemy.ext.asyncio import AsyncSession
-    from sqlalchemy.future import select
+async def _update_job_status(session, job_id: int, status: str):
+    """Set an evaluation job's status"""
+    from sqlalchemy import update
     from app.models.evaluation_job import EvaluationJob
-    from app.db.async_database import AsyncSessionLocal
-    import asyncio
 
-    async def update_job_status(session: AsyncSession, job_id: int, status: str):
-        try:
-            result = await session.execute(select(EvaluationJob).where(EvaluationJob.id == job_id))
-            job = result.scalar_one_or_none()
-            if job:
-                job.status = status
-                await session.flush()
-                await session.commit()
-                logger.info(f"Job {job_id} status updated to {status}")
-            else:
-                logger.warning(f"Job {job_id} not found for status update to {status}")
-        except Exception as e:
-            logger.error(f"Failed to update job {job_id} status to {status}: {e}")
+    try:
+        # A single UPDATE instead of loading the row, mutating it and flushing
+        result = await session.execute(
+            update(EvaluationJob)
+            .where(EvaluationJob.id == job_id)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        if result.rowcount:
+            logger.info(f"Job {job_id} status updated to {status}")
+        else:
+            logger.warning(f"Job {job_id} not found for status update to {status}")
+    except Exception as e:
+        # Leave the session usable for the job's next status transition
+        await session.rollback()
+        logger.error(f"Failed to update job {job_id} status to {status}: {e}")
+
+async def _run_evaluation_job(job_id: int, model_id: int, zip_path: str, csv_path: str,
+                              target_column: str, split_data: bool, task=None):
+    """Run one evaluation job end to end, reporting progress on task when given"""
+    from app.db.async_database import AsyncSessionLocal
 
-    async def run_evaluation_async():
+    # One session for all of the job's status transitions; it hands its connection back to
+    # the pool after each commit, so it holds none while the evaluation runs
+    async with AsyncSessionLocal() as session:
         try:
             # Update job status to PROCESSING
-            async with AsyncSessionLocal() as session:
-                await update_job_status(session, job_id, "PROCESSING")
+            await _update_job_status(session, job_id, "PROCESSING")
 
             # Update task progress
-            self.update_state(state='PROGRESS', meta={'current': 10, 'total': 100, 'status': 'Starting evaluation'})
+            if task is not None:
+                _report_progress(task, 10, 'Starting evaluation')
 
             logger.info(f"Starting run_evaluation_task for job {job_id}")
             # Run the evaluation task
@@ -269,10 +373,10 @@ def evaluate_model_async(self, job_id: int, model_id: int, zip_path: str, csv_pa
             logger.info(f"Completed run_evaluation_task for job {job_id}")
 
             # Update job status to COMPLETED
-            async with AsyncSessionLocal() as session:
-                await update_job_status(session, job_id, "COMPLETED")
+            await _update_job_status(session, job_id, "COMPLETED")
 
-            self.update_state(state='SUCCESS', meta={'current': 100, 'total': 100, 'status': 'Evaluation completed'})
+            if task is not None:
+                task.update_state(state='SUCCESS', meta={'current': 100, 'total': 100, 'status': 'Evaluation completed'})
             return result
 
         except Exception as e:
@@ -281,23 +385,87 @@ def evaluate_model_async(self, job_id: int, model_id: int, zip_path: str, csv_pa
             track_error(ErrorTypes.ML, error_message)
 
             # Update job status to FAILED
-            async with AsyncSessionLocal() as session:
-                await update_job_status(session, job_id, "FAILED")
+            await _update_job_status(session, job_id, "FAILED")
 
-            self.update_state(state='FAILURE', meta={'error': error_message})
+            if task is not None:
+                task.update_state(state='FAILURE', meta={'error': error_message})
             raise e
 
+async def _fail_jobs(job_ids: List[int]):
+    """Mark evaluation jobs FAILED in one session"""
+    from app.db.async_database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        for job_id in job_ids:
+            await _update_job_status(session, job_id, "FAILED")
+
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
+def evaluate_model_async(self, job_id: int, model_id: int, zip_path: str, csv_path: str, target_column: str, split_data: bool):
+    """
+    Asynchronous model evaluation task that integrates with the evaluation engine.
+    """
     try:
-        # Run the async function using asyncio.run
-        return asyncio.run(run_evaluation_async())
+        # Run on the worker process's long-lived loop rather than a fresh asyncio.run loop
+        return run_in_worker_loop(
+            _run_evaluation_job(job_id, model_id, zip_path, csv_path, target_column, split_data, task=self)
+        )
     except Exception as e:
         # Retry logic
         raise self.retry(exc=e)
 
 @celery_app.task
-@track_performance(ML_OPERATIONS["DATA_PREPROCESSING"])  
+def evaluate_models_batch(jobs: List[Dict[str, Any]]):
+    """
+    Run several evaluation jobs from one task message.
+    
+    Each job is a dict of evaluate_model_async's arguments. Up to EVAL_BATCH_CONCURRENCY jobs
+    run at once on the worker loop; a failed job is marked FAILED and reported in the result
+    without retrying the batch. Jobs still unfinished at the soft time limit are marked FAILED.
+    """
+    import asyncio
+
+    if len(jobs) > EVAL_BATCH_MAX_JOBS:
+        raise ValueError(f"Batch of {len(jobs)} jobs exceeds EVAL_BATCH_MAX_JOBS ({EVAL_BATCH_MAX_JOBS})")
+
+    unfinished = {job["job_id"] for job in jobs}
+
+    async def run_job(semaphore, job):
+        async with semaphore:
+            try:
+                result = await _run_evaluation_job(**job)
+            except Exception:
+                # _run_evaluation_job has already marked the job FAILED
+                unfinished.discard(job["job_id"])
+                raise
+            unfinished.discard(job["job_id"])
+            return result
+
+    async def run_batch():
+        semaphore = asyncio.Semaphore(EVAL_BATCH_CONCURRENCY)
+        return await asyncio.gather(
+            *(run_job(semaphore, job) for job in jobs),
+            return_exceptions=True
+        )
+
+    try:
+        results = run_in_worker_loop(run_batch())
+    except SoftTimeLimitExceeded:
+        # The batch coroutine is cancelled; don't leave its jobs stuck in PROCESSING or queued
+        stranded = sorted(unfinished)
+        task_logger.error(f"Evaluation batch hit its time limit; marking jobs {stranded} FAILED")
+        run_in_worker_loop(_fail_jobs(stranded))
+        raise
+    return [
+        {"job_id": job["job_id"], "error": str(result)} if isinstance(result, Exception)
+        else {"job_id": job["job_id"], "result": result}
+        for job, result in zip(jobs, results)
+    ]
+
+@celery_app.task
 def preprocess_data_with_perf_tracking(data: Dict[str, Any]):
     """Data preprocessing with performance tracking"""
-    # Simulate preprocessing
-    time.sleep(2)
-    return {"processed": True, "size": len(str(data))}
+    with track_performance_cm(ML_OPERATIONS["DATA_PREPROCESSING"]):
+        # Simulate preprocessing
+        _simulate_work(2)
+        # Serialized byte size via orjson rather than building the dict's repr string
+        return {"processed": True, "size": len(orjson.dumps(data, default=str))}
@@ -5,89 +5,67 @@ This script checks if the ModelWhiz backend is running properly and if all servi
 """
 
 import requests
-import json
 import sys
-import os
 from datetime import datetime
 
-def check_backend_health():
-    """Check if the backend is running and healthy"""
+BACKEND_URL = "http://localhost:8000"
+
+def fetch_health_report():
+    """Fetch every subsystem status from the backend in a single request"""
     try:
-        # Try to connect to the backend health endpoint
-        response = requests.get("http://localhost:8000/health", timeout=10)
-        if response.status_code == 200:
-            print("✅ Backend is running and healthy")
-            return True
-        else:
-            print(f"❌ Backend returned status code: {response.status_code}")
-            return False
+        response = requests.get(f"{BACKEND_URL}/health/full", timeout=10)
     except requests.exceptions.ConnectionError:
-        print("❌ Cannot connect to backend at http://localhost:8000")
+        print(f"❌ Cannot connect to backend at {BACKEND_URL}")
         print("   Make sure the backend is running with: python -m uvicorn app.main:app --reload --port 8000")
-        return False
+        return None
     except Exception as e:
         print(f"❌ Error checking backend health: {e}")
-        return False
+        return None
 
-def check_celery_workers():
-    """Check if Celery workers are available"""
+    # 503 still carries the per-subsystem report
     try:
-        # Try to connect to the evaluations endpoint with required parameters
-        response = requests.get("http://localhost:8000/api/evaluations/?user_id=test", timeout=10)
-        if response.status_code == 200:
-            print("✅ API endpoints are accessible")
-            return True
-        else:
-            print(f"❌ API endpoints returned status code: {response.status_code}")
-            print(f"   Response: {response.text[:200]}...")
-            return False
-    except Exception as e:
-        print(f"❌ Error checking API endpoints: {e}")
+        return response.json()
+    except ValueError:
+        print(f"❌ Backend returned status code: {response.status_code}")
+        print(f"   Response: {response.text[:200]}...")
+        return None
+
+def check_backend_health(report):
+    """Check if the backend is running and healthy"""
+    if report.get("backend") == "healthy":
+        print("✅ Backend is running and healthy")
+        return True
+    print("❌ Backend reported an unhealthy status")
+    return False
+
+def check_celery_workers(report):
+    """Check if the API and Celery workers are available"""
+    if report.get("api") != "healthy":
+        print("❌ API endpoints are not accessible")
         return False
+    print("✅ API endpoints are accessible")
+    if report.get("workers") != "healthy":
+        print("⚠️  No Celery workers answered the ping")
+        print("   Start one with: celery -A app.workers.celery_app worker")
+    return True
 
-def check_redis_connection():
+def check_redis_connection(report):
     """Check if Redis is available"""
-    try:
-        import redis
-        # Try to connect to Redis in Docker with password
-        r = redis.Redis(host='localhost', port=6379, db=0, password='modelwhiz_redis_password', socket_timeout=5)
-        r.ping()
+    if report.get("redis") == "healthy":
         print("✅ Redis is running and accessible")
         return True
-    except redis.AuthenticationError:
-        try:
-            # Try with empty password
-            r = redis.Redis(host='localhost', port=6379, db=0, password='', socket_timeout=5)
-            r.ping()
-            print("✅ Redis is running and accessible (no password)")
-            return True
-        except Exception as e:
-            print(f"❌ Redis authentication failed: {e}")
-            print("   Try: redis-cli and run 'CONFIG SET requirepass \"\"' to disable password")
-            return False
-    except ImportError:
-        print("⚠️  Redis Python client not installed. Install with: pip install redis")
-        return False
-    except Exception as e:
-        print(f"⚠️  Redis not available: {e}")
-        print("   Celery will use in-memory broker instead")
-        print("   To install Redis: Download from https://redis.io/download")
-        return True  # Return True because Celery can work without Redis
+    print("⚠️  Redis not available")
+    print("   Celery will use in-memory broker instead")
+    print("   To install Redis: Download from https://redis.io/download")
+    return True  # Return True because Celery can work without Redis
 
-def check_database():
+def check_database(report):
     """Check if database is accessible"""
-    try:
-        # Try to access the models endpoint to check database
-        response = requests.get("http://localhost:8000/api/models/", timeout=10)
-        if response.status_code in [200, 401, 403]:  # Any response means DB is working
-            print("✅ Database is accessible")
-            return True
-        else:
-            print(f"❌ Database check returned status code: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Error checking database: {e}")
-        return False
+    if report.get("db") == "healthy":
+        print("✅ Database is accessible")
+        return True
+    print("❌ Database is not accessible")
+    return False
 
 def main():
     """Main health check function"""
@@ -103,11 +81,13 @@ def main():
         ("Database", check_database),
     ]
     
+    # One /health/full call reports every subsystem; the checks only read the report
+    report = fetch_health_report()
+    
     results = []
     for name, check_func in checks:
         print(f"Checking {name}...")
-        result = check_func()
-        results.append((name, result))
+        results.append((name, report is not None and check_func(report)))
         print()
     
     # Summary
@@ -0,0 +1,20 @@
+import numpy as np
+
+from app.utils.evaluation import _accuracy_and_weighted_f1, _confusion_matrix
+
+
+def test_confusion_matrix_small_integer_labels():
+    cm = _confusion_matrix(np.array([0, 1, 2, 1]), np.array([0, 2, 2, 1]))
+    assert cm.tolist() == [[1, 0, 0], [0, 1, 1], [0, 0, 1]]
+
+
+def test_confusion_matrix_sparse_integer_labels_are_remapped():
+    y_true = np.array([0, 100000, 100000, 0, 7_000_000_000])
+    y_pred = np.array([0, 100000, 0, 0, 7_000_000_000])
+
+    cm = _confusion_matrix(y_true, y_pred)
+
+    assert cm.shape == (3, 3)
+    assert cm.tolist() == [[2, 0, 0], [1, 1, 0], [0, 0, 1]]
+    accuracy, _ = _accuracy_and_weighted_f1(cm)
+    assert accuracy == 0.8
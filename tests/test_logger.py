@@ -0,0 +1,37 @@
+import logging
+import os
+
+from app.utils.logger import BufferedRotatingFileHandler
+
+
+def _record(level: int, message: str) -> logging.LogRecord:
+    return logging.LogRecord("modelwhiz", level, __file__, 0, message, None, None)
+
+
+def test_buffered_handler_holds_records_below_warning(tmp_path):
+    path = tmp_path / "app.log"
+    handler = BufferedRotatingFileHandler(
+        str(path), maxBytes=10 * 1024 * 1024, backupCount=1, flush_interval=3600
+    )
+    try:
+        for i in range(50):
+            handler.emit(_record(logging.INFO, f"record {i}"))
+            assert os.path.getsize(path) == 0
+
+        handler.emit(_record(logging.WARNING, "flushed"))
+        assert os.path.getsize(path) > 0
+    finally:
+        handler.close()
+
+
+def test_buffered_handler_rolls_over_on_byte_count(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("x" * 90)
+    handler = BufferedRotatingFileHandler(str(path), maxBytes=100, backupCount=1, flush_interval=3600)
+    try:
+        handler.emit(_record(logging.INFO, "0123456789"))
+        handler.flush()
+        assert (tmp_path / "app.log.1").read_text() == "x" * 90
+        assert path.read_text() == "0123456789\n"
+    finally:
+        handler.close()